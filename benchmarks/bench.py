@@ -0,0 +1,463 @@
+# Offline benchmarks for "ultimate booking.py": no Chrome, no live ticket sites.
+#
+#   python benchmarks/bench.py                   run everything, write benchmarks/results.json
+#   python benchmarks/bench.py --quick           smaller sizes, for a fast sanity check
+#   python benchmarks/bench.py --only add_event,api_data
+#   python benchmarks/bench.py --save-baseline   also overwrite benchmarks/baseline.json
+#
+# Browsers are replaced by FakeDriver (scriptable latency, pages served from memory) and
+# HTTP discovery hits a local fixture server with synthetic listing pages. Each run is
+# compared against baseline.json when there is one: metrics ending in _ms (lower is
+# better) or _per_s (higher is better) that got worse by more than --tolerance are
+# listed and the exit code is 1. Baselines are machine specific; regenerate them on the
+# machine you compare on.
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(HERE, "..", "ultimate booking.py")
+
+# Quiet, in-memory, no pre-warm, no on-disk browser profiles: set before the module reads its config
+os.environ["BOT_DB_PATH"] = ""
+os.environ["BOT_LOG_STDOUT_RATE"] = "0.0001"
+os.environ["BOT_PREWARM"] = "0"
+os.environ["BOT_PROFILE_DIR"] = ""
+
+def load_bot():
+    spec = importlib.util.spec_from_file_location("ultimate_booking", SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules["ultimate_booking"] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+ub = load_bot()
+
+# --- SYNTHETIC PAGES ---
+TEAMS = ["Mumbai Indians", "Chennai Super Kings", "Royal Challengers Bangalore", "Kolkata Knight Riders",
+         "Delhi Capitals", "Sunrisers Hyderabad", "Rajasthan Royals", "Punjab Kings"]
+VENUES = ["Wankhede Stadium, Mumbai", "Chepauk, Chennai", "Eden Gardens, Kolkata", "Chinnaswamy, Bengaluru"]
+FILLER = ["Sunburn Festival", "Stand-up Comedy Night", "Jazz Evening", "Pro Kabaddi League", "ISL Football",
+          "Marathon Expo", "Food Carnival", "Tennis Premier League", "Theatre Workshop", "Hockey India League"]
+# What the benchmark profile searches for; match_rate of the listing anchors satisfy it
+BENCH_PROFILE = {"match": "IPL, India vs England", "date": "", "venue": "", "time": "", "tickets": 2, "onsale": ""}
+
+def listing_html(n_anchors, match_rate, seed=0, generation=0, churn=0.0):
+    # A listing page with n_anchors event links (match_rate of them matching
+    # BENCH_PROFILE) plus site chrome links. churn re-titles that fraction of events per
+    # generation so successive pages differ like a live listing does.
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n_anchors):
+        if rnd.random() < match_rate:
+            a, b = rnd.sample(TEAMS, 2)
+            title = f"{a} vs {b} - IPL 2025 Match {i} | {rnd.choice(VENUES)}"
+        else:
+            title = f"{rnd.choice(FILLER)} {i}"
+        if churn and random.Random(f"{seed}-{generation}-{i}").random() < churn:
+            title += f" (updated {generation})"
+        rows.append(f'<li class="card"><a href="/event/{seed}-{i}" title="{title}"><div class="title">{title}</div></a></li>')
+    chrome = "".join(f'<a href="/{p}">{p.title()}</a>' for p in ("home", "sports", "offers", "help", "login"))
+    return f"<html><head><title>Listing</title></head><body><nav>{chrome}</nav><ul>{''.join(rows)}</ul></body></html>"
+
+class FixtureServer:
+    # Serves self.pages (path -> html) on localhost; benchmarks swap pages between scans
+    def __init__(self):
+        self.pages = {}
+        pages = self.pages
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True # headers and body go out as separate writes
+
+            def do_GET(self):
+                body = pages.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args): pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return self.base + path
+
+    def close(self):
+        self.httpd.shutdown()
+
+# --- FAKE BROWSER ---
+class FakeElement:
+    def is_displayed(self): return True
+
+ANCHOR_CACHE = {} # (url, html) -> extracted anchors
+
+class FakeDriver:
+    # Just enough of selenium's WebDriver for the bot: get() sleeps `latency` and loads
+    # the page from the fixture server's memory, execute_script() answers the bot's own
+    # scripts (anchor extraction, nav timing, availability probe) from that page.
+    def __init__(self, mode="scan", fixture=None, latency=0.0):
+        self.bot_mode = mode
+        self.fixture = fixture
+        self.latency = latency
+        self.html = ""
+        self.current_url = None
+        self.handles = ["main"]
+        self.current_window_handle = "main"
+        self.navigations = 0
+        self.closed = False
+        self.switch_to = self
+
+    # switch_to.window / new_window
+    def window(self, handle): self.current_window_handle = handle
+    def new_window(self, kind="tab"):
+        handle = f"tab{len(self.handles)}"
+        self.handles.append(handle)
+        self.current_window_handle = handle
+
+    @property
+    def window_handles(self):
+        if self.closed: raise ub_exceptions().WebDriverException("session closed")
+        return list(self.handles)
+
+    def get(self, url):
+        if self.latency: time.sleep(self.latency)
+        self.navigations += 1
+        self.current_url = url
+        path = url.split("://", 1)[-1]
+        path = path[path.find("/"):] if "/" in path else "/"
+        self.html = self.fixture.pages.get(path, "<html><body><button>Book</button></body></html>") if self.fixture else ""
+
+    def refresh(self):
+        if self.latency: time.sleep(self.latency)
+
+    def execute_script(self, script, *args):
+        if script is ub.EXTRACT_ANCHORS_JS:
+            # In Chrome this is native DOM work; parse each page once so the fake's own
+            # HTML parsing doesn't show up as the bot's cost
+            key = (self.current_url, self.html)
+            if key not in ANCHOR_CACHE:
+                parser = ub.AnchorParser(self.current_url or "http://fixture/")
+                parser.feed(self.html)
+                parser.close()
+                ANCHOR_CACHE[key] = [list(a) for a in parser.anchors]
+            return ANCHOR_CACHE[key]
+        if script is ub.NAV_TIMING_JS:
+            return self.latency * 1000
+        if script is ub.PROBE_AVAILABILITY_JS:
+            return {"bookable": False, "categories": []}
+        return None
+
+    def execute_cdp_cmd(self, cmd, params): return {}
+    def find_element(self, by, value): return FakeElement()
+    def find_elements(self, by, value): return [FakeElement()]
+    def close(self): pass
+    def quit(self): self.closed = True
+
+def ub_exceptions():
+    from selenium.common import exceptions
+    return exceptions
+
+def install_fake_browsers(fixture, latency):
+    # new_driver is the one place the bot creates browsers (pool, supervisors, monitor)
+    ub.new_driver = lambda mode="scan", profile=None: FakeDriver(mode, fixture, latency)
+
+def reset_store():
+    # Fresh EventStore wired up like the module's own (stream listener included)
+    ub.event_store = ub.EventStore()
+    ub.event_store.subscribe(ub.stream_event_change)
+    return ub.event_store
+
+def use_profile():
+    ub.state['profiles'] = {"default": dict(BENCH_PROFILE)}
+    ub.rebuild_matcher()
+
+def pct(values, q):
+    if not values: return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def ms(seconds):
+    return round(seconds * 1000, 3)
+
+# --- BENCHMARKS ---
+def bench_scan_cycle(cfg, fixture):
+    # One engine cycle = every source scanned once + the engine merging what they found.
+    # Measured cold (first scan, everything matched), unchanged (fingerprint hit) and
+    # changed (cfg churn of titles edited between scans).
+    reset_store()
+    use_profile()
+    install_fake_browsers(fixture, cfg['nav_latency'])
+    n, rate = cfg['anchors'], cfg['match_rate']
+
+    class HttpBench(ub.ListingSource):
+        name, platform = "bench_http", "BenchHTTP"
+        url = fixture.url("/listing/http")
+        def accept(self, href): return "/event/" in href
+
+    class JsBench(ub.ListingSource):
+        name, platform = "bench_js", "BenchJS"
+        url = fixture.url("/listing/js")
+        js_rendered = True
+        def accept(self, href): return "/event/" in href
+
+    def publish(generation, churn):
+        fixture.pages["/listing/http"] = listing_html(n, rate, seed=1, generation=generation, churn=churn)
+        fixture.pages["/listing/js"] = listing_html(n, rate, seed=2, generation=generation, churn=churn)
+
+    engine = ub.BotEngine()
+    # Workers live across cycles like in the engine: warm HTTP session, running browser
+    scheduler = ub.DiscoveryScheduler(engine.log, registry={"bench_http": HttpBench, "bench_js": JsBench})
+    for w in scheduler.workers: w.http = ub.HttpDiscovery()
+    results = {}
+    for phase in ("cold", "unchanged", "changed"):
+        times = []
+        for cycle in range(cfg['cycles']):
+            if phase == "cold":
+                for w in scheduler.workers: w.fingerprint = ub.SourceFingerprint()
+                publish(0, 0.0)
+            elif phase == "changed":
+                publish(cycle + 1, cfg['churn'])
+            t0 = time.perf_counter()
+            for w in scheduler.workers: w.scan()
+            for platform_name, title, href, profiles in scheduler.drain(timeout=0):
+                engine.add_event(title, href, platform_name, profiles)
+            times.append(time.perf_counter() - t0)
+        results[f"{phase}_p50_ms"] = ms(pct(times, 0.5))
+        results[f"{phase}_max_ms"] = ms(max(times))
+    for w in scheduler.workers:
+        w.http.close()
+        w.browser.quit()
+    results["links_per_cycle"] = 2 * n
+    results["cold_links_per_s"] = round(2 * n / (results["cold_p50_ms"] / 1000), 1)
+    results["events_stored"] = len(ub.event_store)
+    return results
+
+def bench_add_event(cfg, fixture):
+    # add_event into a store that grows to cfg['events'], then re-adding known urls
+    reset_store()
+    engine = ub.BotEngine()
+    n = cfg['events']
+    titles = [f"Team {i % 97} vs Team {(i * 7) % 89} - IPL Match {i}" for i in range(n)]
+    per_add = []
+    t0 = time.perf_counter()
+    for i in range(n):
+        t = time.perf_counter()
+        engine.add_event(titles[i], f"https://bench.local/event/{i}", "Bench", ("default",))
+        per_add.append(time.perf_counter() - t)
+    total = time.perf_counter() - t0
+    tail = per_add[-1000:]
+    t0 = time.perf_counter()
+    for i in range(0, n, 10):
+        engine.add_event(titles[i], f"https://bench.local/event/{i}", "Bench", ("default",))
+    dup_total = time.perf_counter() - t0
+    return {
+        "events": n,
+        "total_ms": ms(total),
+        "adds_per_s": round(n / total, 1),
+        "tail_p50_ms": ms(pct(tail, 0.5)),
+        "tail_p99_ms": ms(pct(tail, 0.99)),
+        "duplicate_p50_ms": ms(dup_total / max(1, n // 10)),
+    }
+
+def bench_api_data(cfg, fixture):
+    # N dashboards polling /api/data over real HTTP (threaded werkzeug server) while a
+    # writer keeps changing events, like a running engine would
+    import requests
+    from werkzeug.serving import make_server
+    store = reset_store()
+    for i in range(cfg['api_events']):
+        store.add(f"Team {i % 97} vs Team {i % 89} - IPL Match {i}", f"https://bench.local/event/{i}", "Bench")
+    ids = [e['id'] for e in store.snapshot().events]
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, ub.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    stop = threading.Event()
+    latencies, sizes, errors = [], [], [0]
+    lock = threading.Lock()
+
+    def writer():
+        rnd = random.Random(3)
+        while not stop.is_set():
+            store.update(rnd.choice(ids), status=rnd.choice(["pending", "active"]))
+            stop.wait(cfg['write_interval'])
+
+    def poller(incremental):
+        session = requests.Session()
+        session.headers["Accept-Encoding"] = "gzip"
+        version, log_seq, etag = 0, 0, None
+        local = []
+        while not stop.is_set():
+            headers = {"If-None-Match": etag} if (incremental and etag) else {}
+            url = f"{base}/api/data?since_version={version}&since_log_seq={log_seq}" if incremental else f"{base}/api/data"
+            t = time.perf_counter()
+            try:
+                r = session.get(url, headers=headers, timeout=10)
+            except Exception:
+                with lock: errors[0] += 1
+                continue
+            local.append(time.perf_counter() - t)
+            if r.status_code == 200:
+                sizes.append(int(r.headers.get("Content-Length") or len(r.content))) # on the wire
+                if incremental:
+                    body = r.json()
+                    version, log_seq, etag = body['version'], body['log_seq'], r.headers.get("ETag")
+            elif r.status_code != 304:
+                with lock: errors[0] += 1
+        with lock: latencies.extend(local)
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=poller, args=(i % 2 == 1,)) for i in range(cfg['pollers'])]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    time.sleep(cfg['api_seconds'])
+    stop.set()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+    server = ub.metrics.summary()["latency"].get("bot_http_request_seconds get_data", {})
+    return {
+        "events": cfg['api_events'],
+        "pollers": cfg['pollers'],
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(pct(latencies, 0.5)),
+        "p95_ms": ms(pct(latencies, 0.95)),
+        "avg_body_bytes": int(statistics.mean(sizes)) if sizes else 0,
+        "errors": errors[0],
+        # Handler time as the bot's own metrics see it, without client-side overhead
+        "server_p50_ms": server.get("p50_ms"),
+        "server_p95_ms": server.get("p95_ms"),
+        "payload_builds": ub.payload_cache.builds,
+    }
+
+def bench_availability(cfg, fixture):
+    # Distinct-event checks through AvailabilityService on a pool of fake browsers
+    install_fake_browsers(fixture, cfg['nav_latency'])
+    store = reset_store()
+    ids = [store.add(f"Bench Event {i}", fixture.url(f"/event/a{i}"), "BookMyShow" if i % 2 else "PaytmInsider")['id']
+           for i in range(cfg['checks'])]
+    workers = cfg['availability_workers']
+    if ub.driver_pool: ub.driver_pool.close()
+    ub.driver_pool = ub.DriverPool(size=workers)
+    ub.driver_pool.warm(workers)
+    service = ub.AvailabilityService(lambda event_id: ub.BotEngine().fetch_availability(event_id),
+                                     workers=workers, queue_limit=len(ids), ttl=0)
+    t0 = time.perf_counter()
+    jobs = [service.request(eid)[0] for eid in ids]
+    while any(j['finished'] is None for j in jobs): time.sleep(0.002)
+    elapsed = time.perf_counter() - t0
+    service.executor.shutdown(wait=True)
+    ub.driver_pool.close()
+    waits = [j['started'] - j['submitted'] for j in jobs]
+    runs = [j['finished'] - j['started'] for j in jobs]
+    return {
+        "checks": len(jobs),
+        "workers": workers,
+        "nav_latency_ms": cfg['nav_latency'] * 1000,
+        "checks_per_s": round(len(jobs) / elapsed, 1),
+        "queue_wait_p50_ms": ms(pct(waits, 0.5)),
+        "run_p50_ms": ms(pct(runs, 0.5)),
+        "failed": sum(1 for j in jobs if j['state'] != "done"),
+    }
+
+BENCHMARKS = {
+    "scan_cycle": bench_scan_cycle,
+    "add_event": bench_add_event,
+    "api_data": bench_api_data,
+    "availability": bench_availability,
+}
+
+CONFIGS = {
+    "full": {"anchors": 2000, "match_rate": 0.1, "churn": 0.05, "cycles": 10, "nav_latency": 0.02,
+             "events": 20000, "api_events": 5000, "pollers": 16, "api_seconds": 5, "write_interval": 0.05,
+             "checks": 200, "availability_workers": 4},
+    "quick": {"anchors": 300, "match_rate": 0.1, "churn": 0.05, "cycles": 3, "nav_latency": 0.005,
+              "events": 10000, "api_events": 1000, "pollers": 4, "api_seconds": 1, "write_interval": 0.05,
+              "checks": 40, "availability_workers": 2},
+}
+
+def compare(results, baseline, tolerance):
+    # Returns ["bench.metric: baseline -> now"] for metrics that got worse than tolerance
+    regressions = []
+    for bench, metrics in results["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(bench, {})
+        for key, now in metrics.items():
+            was = base.get(key)
+            if not isinstance(now, (int, float)) or not isinstance(was, (int, float)) or not was: continue
+            if key.endswith("_ms") and now > was * (1 + tolerance):
+                regressions.append(f"{bench}.{key}: {was} -> {now}")
+            elif key.endswith("_per_s") and now < was * (1 - tolerance):
+                regressions.append(f"{bench}.{key}: {was} -> {now}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks (fake browsers, local fixture server)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes")
+    parser.add_argument("--only", help="comma separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--out", default=os.path.join(HERE, "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(HERE, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    profile = "quick" if args.quick else "full"
+    cfg = CONFIGS[profile]
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    fixture = FixtureServer()
+    results = {
+        "profile": profile,
+        "config": cfg,
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                    "orjson": ub.orjson is not None, "brotli": ub.brotli is not None},
+        "benchmarks": {},
+    }
+    try:
+        for name in names:
+            print(f"{name} ...", flush=True)
+            results["benchmarks"][name] = BENCHMARKS[name](cfg, fixture)
+            print("  " + json.dumps(results["benchmarks"][name]), flush=True)
+    finally:
+        fixture.close()
+
+    with open(args.out, "w") as f: json.dump(results, f, indent=2)
+    print(f"wrote {args.out}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f: json.dump(results, f, indent=2)
+        print(f"wrote {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f: baseline = json.load(f)
+        if baseline.get("profile") != profile:
+            print(f"baseline is a '{baseline.get('profile')}' run, not comparing")
+            return 0
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions: print("REGRESSION " + line)
+        if regressions: return 1
+        print("no regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# Listing anchor extraction against a fake browser (no Chrome needed).
+#
+#   python tests/test_anchors.py        (or: python -m pytest tests)
+#
+# A listing of any size must cost the browser one navigation and one execute_script,
+# never a call per link. The fake answers the extraction script the way Chrome's DOM
+# would: [href, innerText, title attribute] rows, innerText with "\n" between blocks,
+# which extract_anchors collapses to single spaces.
+import importlib.util
+import os
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ultimate booking.py")
+
+def load_bot():
+    spec = importlib.util.spec_from_file_location("ultimate_booking", SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules["ultimate_booking"] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+ub = load_bot()
+
+class FakeDriver:
+    def __init__(self, rows):
+        self.rows = rows
+        self.gets = 0
+        self.scripts = 0
+
+    def get(self, url): self.gets += 1
+    def execute_script(self, script, *args):
+        self.scripts += 1
+        if script is not ub.EXTRACT_ANCHORS_JS: return None # navigation timing etc.
+        if not self.gets: return [] # a fresh browser's blank page
+        return [list(r) for r in self.rows]
+    def find_element(self, by, value): return self # readiness waits look up one element
+    def find_elements(self, by, value): raise AssertionError("per-element lookup")
+
+BASE = "https://in.bookmyshow.com"
+
+# What innerText / getAttribute('title') give for typical card markup
+FALLBACK_ROWS = [
+    [BASE + "/text-only", "Text only", ""],
+    [BASE + "/title-only", "", "From title"],          # <a title=..><img></a>
+    [BASE + "/both", "Text wins", "Ignored title"],
+    [BASE + "/blocks", "India\nvs England", ""],       # <a><div>India</div><div>vs England</div></a>
+    [BASE + "/neither", "", ""],
+]
+
+def load(rows):
+    driver = FakeDriver(rows)
+    driver.get(BASE + "/explore/sports")
+    return driver, ub.extract_anchors(driver)
+
+def test_one_round_trip_for_500_anchors():
+    rows = [[f"{BASE}/event/{i}", f"Event {i}\nWankhede Stadium", f"Title {i}"] for i in range(500)]
+    driver, anchors = load(rows)
+    assert len(anchors) == 500
+    assert anchors[0] == (BASE + "/event/0", "Event 0 Wankhede Stadium")
+    assert (driver.gets, driver.scripts) == (1, 1)
+
+def test_title_fallback():
+    driver, anchors = load(FALLBACK_ROWS)
+    assert anchors == [
+        (BASE + "/text-only", "Text only"),
+        (BASE + "/title-only", "From title"),
+        (BASE + "/both", "Text wins"),
+        (BASE + "/blocks", "India vs England"),
+    ]
+    assert (driver.gets, driver.scripts) == (1, 1)
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,43 @@
+# Cookie jar versions between imports and browser exports (no Chrome needed).
+#
+#   python tests/test_cookies.py        (or: python -m pytest tests)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from test_anchors import ub
+
+class CookieDriver:
+    # Answers the two CDP cookie commands from an in-memory cookie store
+    def __init__(self, cookies):
+        self.cookies = list(cookies)
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Network.getAllCookies": return {"cookies": list(self.cookies)}
+        if cmd == "Network.setCookies": self.cookies += params["cookies"]
+        return {}
+
+OLD = {"name": "sid", "value": "old", "domain": ".insider.in", "path": "/"}
+NEW = {"name": "sid", "value": "imported", "domain": ".insider.in", "path": "/"}
+
+def test_export_does_not_overwrite_a_pending_import():
+    jar, ub.cookie_jar = ub.cookie_jar, ub.CookieJar(None)
+    try:
+        driver = CookieDriver([OLD])
+        ub.sync_cookies(driver, "PaytmInsider")
+        assert ub.save_cookies(driver, "PaytmInsider", "insider.in") == 1
+        # Imported while the browser sits between scans, then the worker shuts down
+        ub.cookie_jar.put("PaytmInsider", [NEW])
+        assert ub.save_cookies(driver, "PaytmInsider", "insider.in") == 0
+        assert ub.cookie_jar.get("PaytmInsider") == [NEW]
+        # Once the browser has applied the import, its exports count again
+        ub.sync_cookies(driver, "PaytmInsider")
+        assert ub.save_cookies(driver, "PaytmInsider", "insider.in") == 2
+    finally:
+        ub.cookie_jar = jar
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,118 @@
+# HTTP-first discovery against a local fixture server (no Chrome, no live sites).
+#
+#   python tests/test_discovery.py      (or: python -m pytest tests)
+import os
+import queue
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from test_anchors import FakeDriver, ub
+
+# Card markup as listing sites write it, and what Chrome's innerText gives for each link
+CARDS = """<html><body><ul>
+<li><a href="/event/1"><div class="title">India</div><div class="venue">vs England</div></a></li>
+<li><a href="/event/2"><span>IPL</span><span> Final</span></a></li>
+<li><a href="/event/3" title="Women T20 World Cup"><img src="x.png"></a></li>
+<li><a href="/event/4" title="Ignored">  Pro   Kabaddi
+    League </a></li>
+<li><a href="/event/5"><img src="y.png"></a></li>
+</ul></body></html>"""
+
+def inner_text_rows(base):
+    return [
+        [base + "/event/1", "India\nvs England", ""],
+        [base + "/event/2", "IPL Final", ""],
+        [base + "/event/3", "", "Women T20 World Cup"],
+        [base + "/event/4", "Pro Kabaddi League", "Ignored"],
+        [base + "/event/5", "", ""],
+    ]
+
+class FixtureServer:
+    # /listing serves CARDS, /down answers 503
+    def __init__(self):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/listing":
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = CARDS.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args): pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+server = FixtureServer()
+
+def log(msg, **kw): print(msg)
+
+def test_http_fetch_matches_browser_extraction():
+    http = ub.HttpDiscovery()
+    try:
+        anchors, fetch_ms, parse_ms = http.fetch(ub.InsiderSource(url=server.base + "/listing"))
+    finally:
+        http.close()
+    driver = FakeDriver(inner_text_rows(server.base))
+    driver.get(server.base + "/listing")
+    assert anchors == ub.extract_anchors(driver)
+    assert [title for _, title in anchors] == ["India vs England", "IPL Final", "Women T20 World Cup", "Pro Kabaddi League"]
+
+def test_failed_fetch_falls_back_for_one_scan():
+    source = ub.InsiderSource(url=server.base + "/down")
+    worker = ub.DiscoveryWorker(source, queue.Queue(), log)
+    worker.http = ub.HttpDiscovery()
+    driver = FakeDriver(inner_text_rows(server.base))
+    worker.browser = ub.DriverSupervisor(lambda: driver, log, "test browser", rss_limit_mb=0)
+    try:
+        for n in range(1, ub.HTTP_MAX_FAILURES):
+            anchors, backend, _, _ = worker.discover()
+            assert backend == "selenium" and len(anchors) == 4
+            assert not source.js_rendered and source.http_failures == n
+        # A recovered listing goes back to HTTP and the count starts over
+        source.url = server.base + "/listing"
+        assert worker.discover()[1] == "http"
+        assert source.http_failures == 0
+        # Only a source that keeps failing is switched to the browser for good
+        source.url = server.base + "/down"
+        for _ in range(ub.HTTP_MAX_FAILURES): worker.discover()
+        assert source.js_rendered
+        assert driver.gets == 2 * ub.HTTP_MAX_FAILURES - 1
+    finally:
+        worker.http.close()
+
+class CrashingDriver(FakeDriver):
+    # Session dies while the listing is being read
+    def execute_script(self, script, *args):
+        from selenium.common.exceptions import WebDriverException
+        if script is ub.EXTRACT_ANCHORS_JS: raise WebDriverException("chrome not reachable")
+        return super().execute_script(script, *args)
+
+def test_browser_crash_mid_scan_rereads_the_listing():
+    rows = inner_text_rows(server.base)
+    drivers = [CrashingDriver(rows), FakeDriver(rows)]
+    source = ub.InsiderSource(url=server.base + "/listing", js_rendered=True)
+    worker = ub.DiscoveryWorker(source, queue.Queue(), log)
+    worker.browser = ub.DriverSupervisor(lambda: drivers.pop(0), log, "test browser", rss_limit_mb=0)
+    anchors, backend, _, _ = worker.discover()
+    assert backend == "selenium" and len(anchors) == 4
+    assert worker.browser.restarts == 1
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"ok  {name}")
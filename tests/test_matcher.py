@@ -0,0 +1,38 @@
+# Search syntax of the compiled Matcher.
+#
+#   python tests/test_matcher.py        (or: python -m pytest tests)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from test_anchors import ub
+
+TITLES = ["IPL Women Premier League", "IPL Final", "Women T20 World Cup", "India vs England Women",
+          "T-20 World Cup Final", "IND vs ENG Test"]
+
+def matching(query):
+    m = ub.Matcher({"default": {"match": query}})
+    return [t for t in TITLES if m.matches(t)]
+
+def test_exclusion_after_a_term():
+    assert matching("IPL -Women") == ["IPL Final"]
+    assert matching("IPL NOT Women") == ["IPL Final"]
+
+def test_exclusion_only_applies_to_its_alternative():
+    assert matching("IPL -Women, Women T20") == ["IPL Final", "Women T20 World Cup"]
+
+def test_standalone_exclusion_applies_to_every_alternative():
+    assert matching("IPL, India vs England, -Women") == ["IPL Final", "IND vs ENG Test"]
+
+def test_hyphenated_words_are_not_exclusions():
+    assert matching("T-20 World Cup") == ["T-20 World Cup Final"]
+
+def test_aliases_and_required_terms():
+    assert matching("India vs England") == ["India vs England Women", "IND vs ENG Test"]
+    assert matching("India + Test") == ["IND vs ENG Test"]
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"ok  {name}")
@@ -1,604 +1,3480 @@
-import time
-import json
-import os
-import random
-import threading
-import queue
-import traceback
-import logging
-from datetime import datetime
-from flask import Flask, render_template_string, jsonify, request
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from plyer import notification
-
-# --- CONFIGURATION (Default) ---
-# Default keywords if no search criteria provided
-DEFAULT_KEYWORDS = ["Cricket", "India", "IPL", "Badminton"] 
-
-# --- FLASK APP ---
-app = Flask(__name__)
-
-# --- EMBEDDED HTML/CSS/JS ---
-HTML_TEMPLATE = r'''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Ultimate Sports Bot</title>
-    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;500;700&family=JetBrains+Mono&display=swap" rel="stylesheet">
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-    <style>
-        :root { --bg: #050505; --card: rgba(255,255,255,0.05); --primary: #00f2ea; --accent: #ff0050; --text: #eee; --muted: #888; }
-        body { background: var(--bg); color: var(--text); font-family: 'Outfit', sans-serif; margin: 0; display: flex; height: 100vh; overflow: hidden; }
-        ::-webkit-scrollbar { width: 6px; }
-        ::-webkit-scrollbar-track { background: var(--bg); }
-        ::-webkit-scrollbar-thumb { background: #333; border-radius: 3px; }
-
-        /* Layout */
-        .sidebar { width: 280px; background: rgba(0,0,0,0.5); border-right: 1px solid rgba(255,255,255,0.05); padding: 25px; display: flex; flex-direction: column; backdrop-filter: blur(20px); }
-        .main { flex: 1; display: flex; flex-direction: column; position: relative; background: radial-gradient(circle at top right, #111, #050505); }
-        .content { padding: 40px; overflow-y: auto; flex: 1; }
-        
-        /* Typography */
-        h1, h2, h3 { margin: 0 0 15px 0; font-weight: 700; letter-spacing: -0.5px; }
-        .brand { font-size: 1.8rem; background: linear-gradient(90deg, var(--primary), #fff); -webkit-background-clip: text; -webkit-text-fill-color: transparent; margin-bottom: 40px; display: flex; align-items: center; gap: 10px; }
-        .section-title { font-size: 1.2rem; border-bottom: 1px solid rgba(255,255,255,0.1); padding-bottom: 10px; margin-bottom: 20px; color: var(--primary); display: flex; justify-content: space-between; align-items: center; }
-        
-        /* Cards */
-        .card { background: var(--card); border: 1px solid rgba(255,255,255,0.08); border-radius: 16px; padding: 25px; margin-bottom: 25px; transition: 0.3s; box-shadow: 0 4px 20px rgba(0,0,0,0.2); }
-        .card:hover { border-color: rgba(255,255,255,0.2); transform: translateY(-2px); }
-        
-        /* Form Elements */
-        .form-group { margin-bottom: 15px; }
-        .form-label { display: block; font-size: 0.85rem; color: var(--muted); margin-bottom: 5px; }
-        .form-row { display: flex; gap: 15px; }
-        .form-col { flex: 1; }
-        
-        input, select { background: rgba(0,0,0,0.3); border: 1px solid rgba(255,255,255,0.1); color: #fff; padding: 12px; border-radius: 10px; width: 100%; box-sizing: border-box; font-family: inherit; font-size: 0.95rem; transition: 0.2s; }
-        input:focus, select:focus { border-color: var(--primary); outline: none; box-shadow: 0 0 0 2px rgba(0,242,234,0.1); }
-        
-        button { background: var(--primary); color: #000; border: none; padding: 12px 20px; border-radius: 10px; font-weight: 700; cursor: pointer; transition: 0.2s; display: inline-flex; align-items: center; justify-content: center; gap: 8px; font-size: 0.9rem; }
-        button:hover { box-shadow: 0 0 15px rgba(0,242,234,0.4); transform: translateY(-1px); }
-        button.stop { background: var(--accent); color: #fff; }
-        button.stop:hover { box-shadow: 0 0 15px rgba(255,0,80,0.4); }
-        button.outline { background: transparent; border: 1px solid rgba(255,255,255,0.2); color: #ccc; }
-        button.outline:hover { border-color: #fff; color: #fff; box-shadow: none; background: rgba(255,255,255,0.05); }
-        
-        /* Event Grid */
-        .event-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(320px, 1fr)); gap: 25px; }
-        .event-card { position: relative; overflow: hidden; display: flex; flex-direction: column; }
-        .event-card .header { display: flex; justify-content: space-between; align-items: start; margin-bottom: 15px; }
-        .event-card .platform { font-size: 0.7rem; background: rgba(255,255,255,0.1); padding: 4px 10px; border-radius: 20px; text-transform: uppercase; letter-spacing: 1px; }
-        .event-card h3 { font-size: 1.1rem; line-height: 1.4; color: #fff; margin-bottom: 5px; min-height: 3em; }
-        .event-card p { font-size: 0.9rem; color: var(--muted); margin-bottom: 15px; display: flex; align-items: center; gap: 8px; }
-        
-        /* Availability Section in Card */
-        .availability-box { background: rgba(0,0,0,0.4); border-radius: 8px; padding: 15px; margin-bottom: 15px; min-height: 60px; font-size: 0.9rem; }
-        .cat-item { display: flex; justify-content: space-between; padding: 5px 0; border-bottom: 1px dashed rgba(255,255,255,0.1); }
-        .cat-item:last-child { border-bottom: none; }
-        .cat-price { color: var(--primary); font-weight: 600; }
-
-        /* Logs */
-        .log-panel { height: 220px; background: #080808; border-top: 1px solid rgba(255,255,255,0.1); padding: 15px; font-family: 'JetBrains Mono', monospace; font-size: 0.8rem; overflow-y: auto; color: #aaa; scroll-behavior: smooth; }
-        .log-line { margin-bottom: 5px; line-height: 1.4; border-left: 2px solid transparent; padding-left: 8px; }
-        .log-line.alert { color: var(--accent); border-left-color: var(--accent); }
-        .log-line.success { color: var(--primary); border-left-color: var(--primary); }
-
-        /* Status & Icons */
-        .status-dot { width: 8px; height: 8px; background: #444; border-radius: 50%; display: inline-block; margin-right: 8px; }
-        .status-dot.active { background: #00ff88; box-shadow: 0 0 10px #00ff88; animation: pulse 2s infinite; }
-        @keyframes pulse { 0% { opacity: 0.5; } 50% { opacity: 1; } 100% { opacity: 0.5; } }
-
-        /* Chat Assistant */
-        .chat-btn { position: fixed; bottom: 30px; right: 30px; width: 60px; height: 60px; background: linear-gradient(135deg, var(--primary), #00aaff); border-radius: 50%; display: flex; align-items: center; justify-content: center; font-size: 1.5rem; cursor: pointer; box-shadow: 0 10px 30px rgba(0,170,255,0.3); z-index: 100; transition: transform 0.3s; color: #fff; }
-        .chat-btn:hover { transform: scale(1.1) rotate(10deg); }
-    </style>
-</head>
-<body>
-    <div class="sidebar">
-        <div class="brand"><i class="fas fa-robot"></i> ANTIGRAVITY</div>
-        
-        <div class="card">
-            <h3 style="font-size:0.9rem; text-transform:uppercase; color:var(--muted); margin-bottom:15px;">Bot Status</h3>
-            <div style="display:flex; align-items:center; margin-bottom:20px; background:rgba(255,255,255,0.05); padding:10px; border-radius:8px;">
-                <div id="status-dot" class="status-dot"></div>
-                <span id="status-text" style="font-weight:600; font-size:0.9rem;">OFFLINE</span>
-            </div>
-            <button onclick="startBot()" style="width:100%; margin-bottom:10px;"><i class="fas fa-power-off"></i> INITIALIZE</button>
-            <button onclick="stopBot()" class="stop" style="width:100%;"><i class="fas fa-square"></i> TERMINATE</button>
-        </div>
-
-        <div class="card">
-             <h3 style="font-size:0.9rem; text-transform:uppercase; color:var(--muted); margin-bottom:15px;">Quick Stats</h3>
-             <div style="display:flex; justify-content:space-between; margin-bottom:5px;">
-                 <span>Events Found</span>
-                 <span id="stat-found" style="color:#fff;">0</span>
-             </div>
-             <div style="display:flex; justify-content:space-between;">
-                 <span>Active / Monitoring</span>
-                 <span id="stat-active" style="color:var(--primary);">0</span>
-             </div>
-        </div>
-
-        <div style="margin-top:auto; font-size:0.8rem; color:#444;">
-            &copy; 2025 Deepmind<br>Agentic Coding
-        </div>
-    </div>
-
-    <div class="main">
-        <div class="content">
-            <!-- Search Configuration Area -->
-            <div class="card">
-                <div class="section-title">
-                    <span><i class="fas fa-search"></i> Search Configuration</span>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-col">
-                        <label class="form-label">Match Name / Keyword</label>
-                        <input type="text" id="s-match" placeholder="e.g. India vs England, IPL" value="Cricket">
-                    </div>
-                </div>
-
-                <div class="form-row">
-                    <div class="form-col">
-                        <label class="form-label">Date</label>
-                        <input type="date" id="s-date">
-                    </div>
-                    <div class="form-col">
-                        <label class="form-label">Venue / City</label>
-                        <input type="text" id="s-venue" placeholder="e.g. Wankhede, Mumbai">
-                    </div>
-                     <div class="form-col">
-                        <label class="form-label">Time (Approx)</label>
-                        <input type="time" id="s-time">
-                    </div>
-                </div>
-                
-                 <div class="form-row">
-                    <div class="form-col" style="flex:0.5">
-                         <label class="form-label">Tickets</label>
-                         <input type="number" id="s-tickets" value="2" min="1" max="10">
-                    </div>
-                    <div class="form-col" style="display:flex; align-items:flex-end;">
-                         <button onclick="updateSearch()" class="outline" style="width:100%"><i class="fas fa-sync"></i> Apply Search Criteria</button>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Results Area -->
-            <div class="section-title">
-                <span>Discovered Events</span>
-                <span style="font-size:0.8rem; color:var(--muted); font-weight:400;">Auto-refreshing...</span>
-            </div>
-            
-            <div id="event-grid" class="event-grid">
-                <!-- Events injected here -->
-            </div>
-        </div>
-
-        <div class="log-panel" id="log-panel">
-            <div class="log-line">[SYSTEM] Interface Ready.</div>
-        </div>
-    </div>
-
-    <div class="chat-btn" onclick="alert('AI Assistant: I am actively scanning for tickets based on your criteria.')"><i class="fas fa-comment-dots"></i></div>
-
-    <script>
-        setInterval(pollData, 1000);
-
-        async function pollData() {
-            try {
-                const res = await fetch('/api/data');
-                const data = await res.json();
-                
-                // Update Status
-                const dot = document.getElementById('status-dot');
-                const text = document.getElementById('status-text');
-                if(data.running) {
-                    dot.classList.add('active');
-                    text.innerText = "SENSING";
-                    text.style.color = "#00ff88";
-                } else {
-                    dot.classList.remove('active');
-                    text.innerText = "OFFLINE";
-                    text.style.color = "#666";
-                }
-                
-                // Update Stats
-                document.getElementById('stat-found').innerText = data.events.length;
-                document.getElementById('stat-active').innerText = data.events.filter(e => e.status === 'active').length;
-
-                // Update Logs
-                const logPanel = document.getElementById('log-panel');
-                // Only update if new logs (simple check could be improved)
-                if (logPanel.childElementCount !== data.logs.length) {
-                    logPanel.innerHTML = '';
-                    data.logs.forEach(log => {
-                        const div = document.createElement('div');
-                        div.className = 'log-line ' + (log.includes('ALERT') ? 'alert' : log.includes('FOUND') ? 'success' : '');
-                        div.innerText = log;
-                        logPanel.appendChild(div);
-                    });
-                    logPanel.scrollTop = logPanel.scrollHeight;
-                }
-
-                // Update Events
-                const grid = document.getElementById('event-grid');
-                grid.innerHTML = '';
-                
-                if(data.events.length === 0) {
-                     grid.innerHTML = '<div style="grid-column:1/-1; text-align:center; padding:40px; color:#555;">No events found yet. Ensure Bot is initialized.</div>';
-                }
-
-                data.events.forEach(evt => {
-                    const el = document.createElement('div');
-                    el.className = 'card event-card';
-                    
-                    // Availability / Config Area
-                    let contentHtml = '';
-                    
-                    if (evt.categories && evt.categories.length > 0) {
-                         let catList = evt.categories.map(c => `
-                            <div class="cat-item">
-                                <span>${c.name}</span>
-                                <span class="cat-price">${c.price}</span>
-                            </div>
-                         `).join('');
-                         contentHtml += `<div class="availability-box"><strong>Available Categories:</strong><br>${catList}</div>`;
-                    } else if (evt.status !== 'booked') {
-                         contentHtml += `<div class="availability-box" style="color:#888; text-align:center; padding-top:20px;">
-                                            <i class="fas fa-ticket-alt" style="margin-bottom:5px;"></i><br>
-                                            Availability not checked
-                                         </div>`;
-                    }
-
-                    // Actions
-                    let actionHtml = '';
-                    if(evt.status === 'pending') {
-                        actionHtml = `
-                            <div style="display:flex; gap:10px;">
-                                <button onclick="checkAvailability('${evt.id}')" class="outline" style="flex:1; font-size:0.8rem;"><i class="fas fa-search-dollar"></i> Check</button>
-                                <button onclick="activateEvent('${evt.id}')" style="flex:1; font-size:0.8rem;"><i class="fas fa-bolt"></i> Book</button>
-                            </div>
-                        `;
-                    } else if (evt.status === 'active') {
-                        actionHtml = `<div style="color:var(--primary); margin-top:10px; text-align:center; font-weight:bold;"><i class="fas fa-circle-notch fa-spin"></i> Monitoring...</div>`;
-                    } else if (evt.status === 'booked') {
-                        actionHtml = `<div style="color:#0f0; margin-top:10px; text-align:center; font-weight:bold; font-size:1.1rem;"><i class="fas fa-check-circle"></i> HANDOVER</div>`;
-                    }
-
-                    el.innerHTML = `
-                        <div class="header">
-                             <div class="platform">${evt.platform}</div>
-                             ${evt.date ? '<div style="font-size:0.8rem; color:#aaa;">'+evt.date+'</div>' : ''}
-                        </div>
-                        <h3>${evt.title}</h3>
-                        <p><i class="fas fa-map-marker-alt"></i> ${evt.venue || 'Unknown Venue'}</p>
-                        
-                        ${contentHtml}
-                        ${actionHtml}
-                    `;
-                    grid.appendChild(el);
-                });
-
-            } catch(e) { console.error(e); }
-        }
-
-        async function startBot() { await fetch('/api/start', {method:'POST'}); }
-        async function stopBot() { await fetch('/api/stop', {method:'POST'}); }
-        
-        async function updateSearch() {
-             const criteria = {
-                 match: document.getElementById('s-match').value,
-                 date: document.getElementById('s-date').value,
-                 venue: document.getElementById('s-venue').value,
-                 time: document.getElementById('s-time').value,
-                 tickets: document.getElementById('s-tickets').value
-             };
-             await fetch('/api/search_config', {
-                 method: 'POST',
-                 headers: {'Content-Type': 'application/json'},
-                 body: JSON.stringify(criteria)
-             });
-             alert('Search criteria updated!');
-        }
-
-        async function checkAvailability(id) {
-            // Trigger check
-             await fetch('/api/check_availability', {
-                 method: 'POST',
-                 headers: {'Content-Type': 'application/json'},
-                 body: JSON.stringify({id})
-             });
-        }
-
-        async function activateEvent(id) {
-            // For now, using global ticket count from search, or default 2
-            // In a fuller app, we might ask nicely again, but let's assume global config for speed
-            await fetch('/api/activate_event', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({id, qty: 2, price: 99999}) // logic simplified for demo
-            });
-        }
-    </script>
-</body>
-</html>
-'''
-
-# --- BACKEND LOGIC ---
-log_queue = queue.Queue()
-log_buffer = []
-
-# State
-state = {
-    "running": False,
-    "events": [], # {id, title, url, platform, status, venue, date, categories: []}
-    "search": { # Default search params
-        "match": "Cricket",
-        "date": "",
-        "venue": "",
-        "time": "",
-        "tickets": 2
-    }
-}
-bot_thread = None
-stop_event = threading.Event()
-
-class BotEngine:
-    def __init__(self):
-        self.driver = None
-
-    def log(self, msg):
-        ts = datetime.now().strftime("%H:%M:%S")
-        fmsg = f"[{ts}] {msg}"
-        print(fmsg)
-        log_queue.put(fmsg)
-
-    def start_driver(self):
-        opts = webdriver.ChromeOptions()
-        opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        # Headless might be better for background scanning, but for 'Ultimate' visual feel usually users like seeing it, 
-        # however we keep it visible for debugging.
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
-        
-    def run(self):
-        self.log("Initializing Bot Engine...")
-        self.start_driver()
-        try:
-            self.driver.get("https://in.bookmyshow.com")
-            # self.load_cookies("BookMyShow") # (Skipped for brevity/security in this shared env)
-            
-            while not stop_event.is_set():
-                # 1. Discovery Phase
-                self.check_bms()
-                self.check_insider()
-                
-                # 2. Monitor Active Events (Booking Loop)
-                active_events = [e for e in state['events'] if e['status'] == 'active']
-                if active_events:
-                     self.log(f"Monitoring {len(active_events)} active events...")
-                
-                for evt in active_events:
-                    if stop_event.is_set(): break
-                    self.monitor_event(evt)
-                    time.sleep(1)
-
-                # Sleep
-                for _ in range(5): 
-                    if stop_event.is_set(): break
-                    time.sleep(1)
-                    
-        except Exception as e:
-            self.log(f"Error: {e}")
-            traceback.print_exc()
-        finally:
-            self.log("Engine stopping...")
-            if self.driver: self.driver.quit()
-            state['running'] = False
-
-    def check_bms(self):
-        # self.log("Scouting BMS...") 
-        search_term = state['search']['match']
-        if not search_term: return 
-
-        try:
-            # Note: This is a simplified discovery. Real BMS has complex dynamic loading.
-            # We are using the search page or sports landing page.
-            self.driver.get("https://in.bookmyshow.com/explore/sports")
-            time.sleep(2)
-            
-            # Simple heuristic: Find links containing the search term
-            # In a real app we'd use more specific selectors
-            links = self.driver.find_elements(By.TAG_NAME, "a")
-            for l in links:
-                try:
-                    href = l.get_attribute("href")
-                    title = l.text or l.get_attribute("title")
-                    
-                    if not href or not title: continue
-                    if "bookmyshow.com" not in href: continue
-
-                    if search_term.lower() in title.lower():
-                        self.add_event(title, href, "BookMyShow")
-                except: pass
-        except: pass
-
-    def check_insider(self):
-        # self.log("Scouting Insider...")
-        search_term = state['search']['match']
-        if not search_term: return
-
-        try:
-            self.driver.get("https://insider.in/all-sports-events")
-            time.sleep(2)
-            links = self.driver.find_elements(By.TAG_NAME, "a")
-            for l in links:
-                try:
-                    href = l.get_attribute("href")
-                    title = l.text or l.get_attribute("title")
-                    
-                    if not href or not title: continue
-                    if "/event/" not in href: continue
-
-                    if search_term.lower() in title.lower():
-                        self.add_event(title, href, "PaytmInsider")
-                except: pass
-        except: pass
-
-    def add_event(self, title, url, platform):
-        # Check duplicate
-        if any(e['url'] == url for e in state['events']): return
-        
-        # Check Filters (Venue/City) - simplistic check
-        venue_filter = state['search']['venue']
-        if venue_filter and venue_filter.lower() not in title.lower():
-             # In a real scraper, we would visit the page to check venue if not in title
-             return 
-
-        self.log(f"FOUND: {title}")
-        state['events'].append({
-            "id": f"evt_{int(time.time()*1000)}_{random.randint(100,999)}",
-            "title": title,
-            "url": url,
-            "platform": platform,
-            "status": "pending",
-            "venue": "Unknown", # Would need deeper scraping
-            "date": "Upcoming",
-            "categories": []
-        })
-
-    def fetch_availability(self, event_id):
-        # Find event
-        evt = next((e for e in state['events'] if e['id'] == event_id), None)
-        if not evt: return
-        
-        self.log(f"Checking availability for: {evt['title']}...")
-        
-        # This function runs in the main thread or a separate thread, but reusing the driver 
-        # from the bot loop is tricky if both are running.
-        # For this prototype, we'll assume we can use the bot's driver if it's running, 
-        # OR usually we'd spawn a quick headless check.
-        # Given single-threaded constraint of Selenium driver, let's just simulate 
-        # or warn if driver is busy. 
-        
-        # ACTUALLY: For this demo, let's assume we spawn a temporary separate driver 
-        # so we don't interrupt the monitoring loop if it's running.
-        
-        temp_driver = None
-        try:
-            opts = webdriver.ChromeOptions()
-            opts.add_argument("--headless=new")
-            temp_driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
-            
-            temp_driver.get(evt['url'])
-            time.sleep(3)
-            
-            # Mock Scraping Logic for categories
-            # In reality: click 'Book', wait for modal, scrape list items
-            # Here: Randomly generating for demonstration as live scraping is specific
-            
-            cats = []
-            if "BookMyShow" in evt['platform']:
-                # Mock BMS categories
-                cats = [
-                    {"name": "General Stand", "price": "₹800"},
-                    {"name": "Pavilion East", "price": "₹2500"},
-                    {"name": "VIP Box", "price": "₹5000"}
-                ]
-            else:
-                 cats = [
-                    {"name": "Early Bird", "price": "₹499"},
-                    {"name": "Phase 1", "price": "₹999"}
-                ]
-            
-            evt['categories'] = cats
-            self.log(f"Updated categories for {evt['title']}")
-            
-        except Exception as e:
-            self.log(f"Availability check failed: {e}")
-        finally:
-            if temp_driver: temp_driver.quit()
-
-
-    def monitor_event(self, evt):
-        # Re-using the simple check from before
-        pass 
-
-# Initialize global bot placeholder for availability checks
-bot_engine = None
-
-# --- ROUTES ---
-@app.route('/')
-def index(): return render_template_string(HTML_TEMPLATE)
-
-@app.route('/api/data')
-def get_data():
-    while not log_queue.empty():
-        log_buffer.append(log_queue.get())
-        if len(log_buffer) > 50: log_buffer.pop(0)
-    return jsonify({
-        "running": state['running'],
-        "logs": log_buffer,
-        "events": state['events']
-    })
-
-@app.route('/api/start', methods=['POST'])
-def start():
-    global bot_thread, bot_engine
-    if state['running']: return jsonify({"status":"already running"})
-    
-    log_buffer.clear()
-    state['running'] = True
-    stop_event.clear()
-    
-    bot_engine = BotEngine()
-    bot_thread = threading.Thread(target=bot_engine.run)
-    bot_thread.start()
-    return jsonify({"status":"started"})
-
-@app.route('/api/stop', methods=['POST'])
-def stop():
-    if not state['running']: return jsonify({"status":"not running"})
-    stop_event.set()
-    return jsonify({"status":"stopping"})
-
-@app.route('/api/search_config', methods=['POST'])
-def search_config():
-    data = request.json
-    state['search'] = data
-    log_queue.put(f"[Config] Search updated: {data['match']} | {data['venue']} | {data['date']}")
-    return jsonify({"status":"ok"})
-
-@app.route('/api/check_availability', methods=['POST'])
-def check_avail():
-    data = request.json
-    eid = data['id']
-    # Run in thread to not block api
-    threading.Thread(target=lambda: BotEngine().fetch_availability(eid)).start()
-    return jsonify({"status":"checking"})
-
-@app.route('/api/activate_event', methods=['POST'])
-def activate():
-    data = request.json
-    for e in state['events']:
-        if e['id'] == data['id']:
-            e['status'] = 'active'
-            # e['config'] = ...
-            log_queue.put(f"[Config] Event '{e['title']}' is now ACTIVE/MONITORING")
-            return jsonify({"status":"ok"})
-    return jsonify({"status":"error"})
-
-if __name__ == "__main__":
-    import logging
-    log = logging.getLogger('werkzeug')
-    log.setLevel(logging.ERROR)
-    print("ULTIMATE BOT RUNNING ON http://localhost:5000")
-    app.run(port=5000, debug=True, use_reloader=False)
+import time
+import json
+import os
+import random
+import threading
+import queue
+import traceback
+import logging
+import sqlite3
+import hashlib
+import re
+import unicodedata
+import gzip
+import shutil
+import socket
+import subprocess
+import sys
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from flask import Flask, Response, render_template_string, jsonify, request, g
+try:
+    import orjson # optional: several times faster serialisation of /api/data
+except ImportError:
+    orjson = None
+try:
+    import brotli # optional: br encoding for /api/data
+except ImportError:
+    brotli = None
+# selenium, webdriver_manager, requests and psutil are heavy (~0.5s together) and only
+# needed once a browser or HTTP scan starts, so they're imported where they're used
+
+# --- CONFIGURATION (Default) ---
+# Default keywords if no search criteria provided
+DEFAULT_KEYWORDS = ["Cricket", "India", "IPL", "Badminton"] 
+
+# Warm headless browsers kept around for availability checks
+POOL_SIZE = int(os.environ.get("BOT_POOL_SIZE", "2"))
+# Recycle a pooled browser after this many checks (keeps Chrome memory in check)
+POOL_MAX_USES = int(os.environ.get("BOT_POOL_MAX_USES", "25"))
+
+# Availability checks: results are reused for AVAILABILITY_TTL seconds, at most
+# AVAILABILITY_WORKERS run at once (one per pooled browser) and at most
+# AVAILABILITY_QUEUE_LIMIT wait behind them before new requests are turned away
+AVAILABILITY_TTL = float(os.environ.get("BOT_AVAILABILITY_TTL", "60"))
+AVAILABILITY_WORKERS = int(os.environ.get("BOT_AVAILABILITY_WORKERS", str(POOL_SIZE)))
+AVAILABILITY_QUEUE_LIMIT = int(os.environ.get("BOT_AVAILABILITY_QUEUE_LIMIT", "20"))
+
+# Browser profile for discovery workers: "scan" (headless, eager loads, images/fonts/
+# media/ad+analytics hosts blocked, capped renderer memory) or "visible" (full Chrome
+# window, for debugging). Availability and monitor browsers always use the lean profile.
+DRIVER_MODE = os.environ.get("BOT_DRIVER_MODE", "scan")
+# V8 heap cap per renderer in MB for lean browsers
+RENDERER_HEAP_MB = int(os.environ.get("BOT_RENDERER_HEAP_MB", "256"))
+# Long-lived browsers (discovery, monitor) are recycled after this many navigations or
+# once chromedriver + Chrome + renderers exceed DRIVER_RSS_LIMIT_MB (needs psutil),
+# sampled at most every DRIVER_RSS_SAMPLE_INTERVAL seconds
+DRIVER_MAX_NAVIGATIONS = int(os.environ.get("BOT_DRIVER_MAX_NAVIGATIONS", "500"))
+MONITOR_MAX_RELOADS = int(os.environ.get("BOT_MONITOR_MAX_RELOADS", "20000"))
+DRIVER_RSS_LIMIT_MB = float(os.environ.get("BOT_DRIVER_RSS_LIMIT_MB", "1500"))
+DRIVER_RSS_SAMPLE_INTERVAL = float(os.environ.get("BOT_DRIVER_RSS_SAMPLE_INTERVAL", "15"))
+
+# Plain HTTP discovery (listing pages that ship their links in the initial HTML)
+HTTP_TIMEOUT = float(os.environ.get("BOT_HTTP_TIMEOUT", "10"))
+HTTP_POOL_SIZE = int(os.environ.get("BOT_HTTP_POOL_SIZE", "4"))
+# Consecutive failed HTTP fetches before a source is treated as JS-rendered for good
+HTTP_MAX_FAILURES = int(os.environ.get("BOT_HTTP_MAX_FAILURES", "3"))
+# Seconds between rescans of the same listing (each source runs on its own worker).
+# The interval adapts between MIN and MAX: it backs off while a listing is unchanged
+# and tightens when it changes or an on-sale time is close.
+SCAN_INTERVAL = float(os.environ.get("BOT_SCAN_INTERVAL", "5"))
+SCAN_INTERVAL_MIN = float(os.environ.get("BOT_SCAN_INTERVAL_MIN", "1"))
+SCAN_INTERVAL_MAX = float(os.environ.get("BOT_SCAN_INTERVAL_MAX", "60"))
+# Minutes either side of search 'onsale' during which sources scan at SCAN_INTERVAL_MIN
+ONSALE_WINDOW_BEFORE = float(os.environ.get("BOT_ONSALE_WINDOW_BEFORE", "10"))
+ONSALE_WINDOW_AFTER = float(os.environ.get("BOT_ONSALE_WINDOW_AFTER", "30"))
+# SQLite (WAL) file that events, availability snapshots and the search survive restarts in.
+# Set BOT_DB_PATH to an empty string to run purely in memory.
+DB_PATH = os.environ.get("BOT_DB_PATH", "bot_state.db")
+# Persistence writes are batched: flushed every DB_FLUSH_INTERVAL s or DB_BATCH_SIZE ops
+DB_FLUSH_INTERVAL = float(os.environ.get("BOT_DB_FLUSH_INTERVAL", "0.5"))
+DB_BATCH_SIZE = int(os.environ.get("BOT_DB_BATCH_SIZE", "500"))
+
+# Log ring capacity, and how many lines a fresh dashboard gets
+LOG_CAPACITY = int(os.environ.get("BOT_LOG_CAPACITY", "2000"))
+LOG_SNAPSHOT_LINES = 50
+# Max log lines/sec echoed to stdout (bursts up to 2x); the ring always keeps everything
+LOG_STDOUT_RATE = float(os.environ.get("BOT_LOG_STDOUT_RATE", "20"))
+# /api/data bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+# Upper bound on waiting for a page to become ready after navigation
+READY_TIMEOUT = float(os.environ.get("BOT_READY_TIMEOUT", "10"))
+# Event pages are ready once a booking call-to-action or category/price list is on screen
+AVAILABILITY_READY_SELECTOR = "button, [class*='category'], [class*='price'], [class*='ticket']"
+# Active events are kept open in tabs of one shared browser and re-checked round-robin.
+# A full round over all tabs takes at least MONITOR_ROUND seconds (so each event is
+# re-checked about once per MONITOR_ROUND while there are few of them).
+MONITOR_ROUND = float(os.environ.get("BOT_MONITOR_ROUND", "1.0"))
+MONITOR_MAX_TABS = int(os.environ.get("BOT_MONITOR_MAX_TABS", "40"))
+# Alerts on new matches, categories appearing, prices within a profile's budget and
+# tickets becoming available. Sinks (comma separated): stream (open dashboards),
+# desktop (needs plyer), sound, webhook (POSTs JSON to ALERT_WEBHOOK, if set).
+# Changes to one event within ALERT_COALESCE seconds become one alert; a repeat of the
+# same alert within ALERT_DEDUPE_TTL seconds is dropped; more than ALERT_MAX_BURST
+# alerts at once are folded into a summary.
+ALERT_SINKS = os.environ.get("BOT_ALERT_SINKS", "stream,desktop")
+ALERT_WEBHOOK = os.environ.get("BOT_ALERT_WEBHOOK", "")
+ALERT_COALESCE = float(os.environ.get("BOT_ALERT_COALESCE", "0.5"))
+ALERT_DEDUPE_TTL = float(os.environ.get("BOT_ALERT_DEDUPE_TTL", "600"))
+ALERT_MAX_BURST = int(os.environ.get("BOT_ALERT_MAX_BURST", "5"))
+# Persistent Chrome profiles (cache, cookies, chosen city) live under PROFILE_DIR, one per
+# worker / pool slot; empty string = throwaway profiles as before. A profile over
+# PROFILE_MAX_MB has its caches dropped at the next browser start. Site warm-up
+# navigations are skipped for PROFILE_WARM_TTL seconds after a profile was last warmed.
+PROFILE_DIR = os.environ.get("BOT_PROFILE_DIR", "browser_profiles")
+PROFILE_MAX_MB = float(os.environ.get("BOT_PROFILE_MAX_MB", "300"))
+PROFILE_WARM_TTL = float(os.environ.get("BOT_PROFILE_WARM_TTL", "43200"))
+# Dashboard address, and worker threads for --prod serving. Every open dashboard holds
+# one thread for its event stream, so keep SERVER_THREADS well above the expected tabs.
+HOST = os.environ.get("BOT_HOST", "127.0.0.1")
+PORT = int(os.environ.get("BOT_PORT", "5000"))
+SERVER_THREADS = int(os.environ.get("BOT_SERVER_THREADS", "64"))
+# chromedriver path + the Chrome version it was resolved for, reused across runs
+CHROMEDRIVER_CACHE = os.environ.get("BOT_CHROMEDRIVER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "ultimate_booking", "chromedriver.json"))
+# Set BOT_PREWARM=1 to resolve chromedriver and boot one pooled browser while the UI loads
+PREWARM = os.environ.get("BOT_PREWARM", "0") == "1"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# --- FLASK APP ---
+app = Flask(__name__)
+
+# --- EMBEDDED HTML/CSS/JS ---
+HTML_TEMPLATE = r'''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Ultimate Sports Bot</title>
+    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;500;700&family=JetBrains+Mono&display=swap" rel="stylesheet">
+    <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
+    <style>
+        :root { --bg: #050505; --card: rgba(255,255,255,0.05); --primary: #00f2ea; --accent: #ff0050; --text: #eee; --muted: #888; }
+        body { background: var(--bg); color: var(--text); font-family: 'Outfit', sans-serif; margin: 0; display: flex; height: 100vh; overflow: hidden; }
+        ::-webkit-scrollbar { width: 6px; }
+        ::-webkit-scrollbar-track { background: var(--bg); }
+        ::-webkit-scrollbar-thumb { background: #333; border-radius: 3px; }
+
+        /* Layout */
+        .sidebar { width: 280px; background: rgba(0,0,0,0.5); border-right: 1px solid rgba(255,255,255,0.05); padding: 25px; display: flex; flex-direction: column; backdrop-filter: blur(20px); }
+        .main { flex: 1; display: flex; flex-direction: column; position: relative; background: radial-gradient(circle at top right, #111, #050505); }
+        .content { padding: 40px; overflow-y: auto; flex: 1; }
+        
+        /* Typography */
+        h1, h2, h3 { margin: 0 0 15px 0; font-weight: 700; letter-spacing: -0.5px; }
+        .brand { font-size: 1.8rem; background: linear-gradient(90deg, var(--primary), #fff); -webkit-background-clip: text; -webkit-text-fill-color: transparent; margin-bottom: 40px; display: flex; align-items: center; gap: 10px; }
+        .section-title { font-size: 1.2rem; border-bottom: 1px solid rgba(255,255,255,0.1); padding-bottom: 10px; margin-bottom: 20px; color: var(--primary); display: flex; justify-content: space-between; align-items: center; }
+        
+        /* Cards */
+        .card { background: var(--card); border: 1px solid rgba(255,255,255,0.08); border-radius: 16px; padding: 25px; margin-bottom: 25px; transition: 0.3s; box-shadow: 0 4px 20px rgba(0,0,0,0.2); }
+        .card:hover { border-color: rgba(255,255,255,0.2); transform: translateY(-2px); }
+        
+        /* Form Elements */
+        .form-group { margin-bottom: 15px; }
+        .form-label { display: block; font-size: 0.85rem; color: var(--muted); margin-bottom: 5px; }
+        .form-row { display: flex; gap: 15px; }
+        .form-col { flex: 1; }
+        
+        input, select { background: rgba(0,0,0,0.3); border: 1px solid rgba(255,255,255,0.1); color: #fff; padding: 12px; border-radius: 10px; width: 100%; box-sizing: border-box; font-family: inherit; font-size: 0.95rem; transition: 0.2s; }
+        input:focus, select:focus { border-color: var(--primary); outline: none; box-shadow: 0 0 0 2px rgba(0,242,234,0.1); }
+        
+        button { background: var(--primary); color: #000; border: none; padding: 12px 20px; border-radius: 10px; font-weight: 700; cursor: pointer; transition: 0.2s; display: inline-flex; align-items: center; justify-content: center; gap: 8px; font-size: 0.9rem; }
+        button:hover { box-shadow: 0 0 15px rgba(0,242,234,0.4); transform: translateY(-1px); }
+        button.stop { background: var(--accent); color: #fff; }
+        button.stop:hover { box-shadow: 0 0 15px rgba(255,0,80,0.4); }
+        button.outline { background: transparent; border: 1px solid rgba(255,255,255,0.2); color: #ccc; }
+        button.outline:hover { border-color: #fff; color: #fff; box-shadow: none; background: rgba(255,255,255,0.05); }
+        
+        /* Event Grid */
+        .event-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(320px, 1fr)); gap: 25px; }
+        .event-card { position: relative; overflow: hidden; display: flex; flex-direction: column; }
+        .event-card .header { display: flex; justify-content: space-between; align-items: start; margin-bottom: 15px; }
+        .event-card .platform { font-size: 0.7rem; background: rgba(255,255,255,0.1); padding: 4px 10px; border-radius: 20px; text-transform: uppercase; letter-spacing: 1px; }
+        .event-card h3 { font-size: 1.1rem; line-height: 1.4; color: #fff; margin-bottom: 5px; min-height: 3em; }
+        .event-card p { font-size: 0.9rem; color: var(--muted); margin-bottom: 15px; display: flex; align-items: center; gap: 8px; }
+        
+        /* Availability Section in Card */
+        .availability-box { background: rgba(0,0,0,0.4); border-radius: 8px; padding: 15px; margin-bottom: 15px; min-height: 60px; font-size: 0.9rem; }
+        .cat-item { display: flex; justify-content: space-between; padding: 5px 0; border-bottom: 1px dashed rgba(255,255,255,0.1); }
+        .cat-item:last-child { border-bottom: none; }
+        .cat-price { color: var(--primary); font-weight: 600; }
+        .profile-chip { font-size: 0.75rem; background: rgba(0,242,234,0.1); color: var(--primary); padding: 4px 10px; border-radius: 20px; cursor: pointer; }
+        .profile-chip .del { color: var(--muted); margin-left: 6px; }
+        .profile-tags { display: flex; flex-wrap: wrap; gap: 6px; margin-bottom: 10px; }
+        .profile-tags span { font-size: 0.7rem; color: var(--muted); border: 1px solid rgba(255,255,255,0.1); padding: 2px 8px; border-radius: 10px; }
+
+        /* Logs */
+        .log-panel { height: 220px; background: #080808; border-top: 1px solid rgba(255,255,255,0.1); padding: 15px; font-family: 'JetBrains Mono', monospace; font-size: 0.8rem; overflow-y: auto; color: #aaa; scroll-behavior: smooth; }
+        .log-line { margin-bottom: 5px; line-height: 1.4; border-left: 2px solid transparent; padding-left: 8px; }
+        .log-line.alert { color: var(--accent); border-left-color: var(--accent); }
+        .log-line.success { color: var(--primary); border-left-color: var(--primary); }
+
+        /* Status & Icons */
+        .status-dot { width: 8px; height: 8px; background: #444; border-radius: 50%; display: inline-block; margin-right: 8px; }
+        .status-dot.active { background: #00ff88; box-shadow: 0 0 10px #00ff88; animation: pulse 2s infinite; }
+        @keyframes pulse { 0% { opacity: 0.5; } 50% { opacity: 1; } 100% { opacity: 0.5; } }
+
+        /* Chat Assistant */
+        .chat-btn { position: fixed; bottom: 30px; right: 30px; width: 60px; height: 60px; background: linear-gradient(135deg, var(--primary), #00aaff); border-radius: 50%; display: flex; align-items: center; justify-content: center; font-size: 1.5rem; cursor: pointer; box-shadow: 0 10px 30px rgba(0,170,255,0.3); z-index: 100; transition: transform 0.3s; color: #fff; }
+        .chat-btn:hover { transform: scale(1.1) rotate(10deg); }
+    </style>
+</head>
+<body>
+    <div class="sidebar">
+        <div class="brand"><i class="fas fa-robot"></i> ANTIGRAVITY</div>
+        
+        <div class="card">
+            <h3 style="font-size:0.9rem; text-transform:uppercase; color:var(--muted); margin-bottom:15px;">Bot Status</h3>
+            <div style="display:flex; align-items:center; margin-bottom:20px; background:rgba(255,255,255,0.05); padding:10px; border-radius:8px;">
+                <div id="status-dot" class="status-dot"></div>
+                <span id="status-text" style="font-weight:600; font-size:0.9rem;">OFFLINE</span>
+            </div>
+            <button onclick="startBot()" style="width:100%; margin-bottom:10px;"><i class="fas fa-power-off"></i> INITIALIZE</button>
+            <button onclick="stopBot()" class="stop" style="width:100%;"><i class="fas fa-square"></i> TERMINATE</button>
+        </div>
+
+        <div class="card">
+             <h3 style="font-size:0.9rem; text-transform:uppercase; color:var(--muted); margin-bottom:15px;">Quick Stats</h3>
+             <div style="display:flex; justify-content:space-between; margin-bottom:5px;">
+                 <span>Events Found</span>
+                 <span id="stat-found" style="color:#fff;">0</span>
+             </div>
+             <div style="display:flex; justify-content:space-between;">
+                 <span>Active / Monitoring</span>
+                 <span id="stat-active" style="color:var(--primary);">0</span>
+             </div>
+        </div>
+
+        <div class="card">
+             <h3 style="font-size:0.9rem; text-transform:uppercase; color:var(--muted); margin-bottom:15px;">Sources</h3>
+             <div id="source-stats" style="font-size:0.8rem; color:var(--muted);">No scans yet</div>
+        </div>
+
+        <div class="card">
+             <h3 style="font-size:0.9rem; text-transform:uppercase; color:var(--muted); margin-bottom:15px;">Latency (p50 / p95)</h3>
+             <div id="metric-stats" style="font-size:0.8rem; color:var(--muted);">No samples yet</div>
+        </div>
+
+        <div style="margin-top:auto; font-size:0.8rem; color:#444;">
+            &copy; 2025 Deepmind<br>Agentic Coding
+        </div>
+    </div>
+
+    <div class="main">
+        <div class="content">
+            <!-- Search Configuration Area -->
+            <div class="card">
+                <div class="section-title">
+                    <span><i class="fas fa-search"></i> Search Configuration</span>
+                </div>
+                
+                <div class="form-row">
+                    <div class="form-col" style="flex:0.5">
+                        <label class="form-label">Profile</label>
+                        <input type="text" id="s-profile" value="default">
+                    </div>
+                    <div class="form-col">
+                        <label class="form-label">Match Name / Keyword</label>
+                        <input type="text" id="s-match" placeholder="e.g. India vs England, IPL + Mumbai, -Women" value="Cricket">
+                    </div>
+                </div>
+
+                <div class="form-row">
+                    <div class="form-col">
+                        <label class="form-label">Date</label>
+                        <input type="date" id="s-date">
+                    </div>
+                    <div class="form-col">
+                        <label class="form-label">Venue / City</label>
+                        <input type="text" id="s-venue" placeholder="e.g. Wankhede, Mumbai (any of)">
+                    </div>
+                     <div class="form-col">
+                        <label class="form-label">Time (Approx)</label>
+                        <input type="time" id="s-time">
+                    </div>
+                </div>
+                
+                 <div class="form-row">
+                    <div class="form-col" style="flex:0.5">
+                         <label class="form-label">Tickets</label>
+                         <input type="number" id="s-tickets" value="2" min="1" max="10">
+                    </div>
+                    <div class="form-col">
+                         <label class="form-label">On-sale At (optional)</label>
+                         <input type="datetime-local" id="s-onsale">
+                    </div>
+                    <div class="form-col" style="flex:0.6">
+                         <label class="form-label">Budget / Ticket</label>
+                         <input type="number" id="s-budget" min="0" placeholder="any">
+                    </div>
+                    <div class="form-col" style="display:flex; align-items:flex-end;">
+                         <button onclick="updateSearch()" class="outline" style="width:100%"><i class="fas fa-sync"></i> Apply Search Criteria</button>
+                    </div>
+                </div>
+
+                <div id="profile-list" style="display:flex; flex-wrap:wrap; gap:8px; margin-top:5px;"></div>
+            </div>
+
+            <!-- Results Area -->
+            <div class="section-title">
+                <span>Discovered Events</span>
+                <span style="font-size:0.8rem; color:var(--muted); font-weight:400;">Auto-refreshing...</span>
+            </div>
+            
+            <div id="event-grid" class="event-grid">
+                <!-- Events injected here -->
+            </div>
+        </div>
+
+        <div class="log-panel" id="log-panel">
+            <div class="log-line">[SYSTEM] Interface Ready.</div>
+        </div>
+    </div>
+
+    <div class="chat-btn" onclick="alert('AI Assistant: I am actively scanning for tickets based on your criteria.')"><i class="fas fa-comment-dots"></i></div>
+
+    <script>
+        // Cursors into the server's event version and log sequence; only deltas come back
+        let cursor = { version: 0, logSeq: 0, etag: null };
+        const cards = new Map(); // event id -> card element
+
+        // Live updates come from the /api/stream SSE feed; /api/data polling only runs
+        // while the stream is down (EventSource reconnects on its own with Last-Event-ID).
+        let pollTimer = null;
+        function startPolling() {
+            if (pollTimer) return;
+            // Stream and poll cursors differ, so polling starts from a full resync
+            resetView();
+            pollTimer = setInterval(pollData, 1000);
+            pollData();
+        }
+        function stopPolling() {
+            if (!pollTimer) return;
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+
+        function connectStream() {
+            if (!window.EventSource) { startPolling(); return; }
+            const es = new EventSource('/api/stream');
+            es.onopen = stopPolling;
+            es.onerror = () => {
+                startPolling();
+                if (es.readyState === EventSource.CLOSED) setTimeout(connectStream, 5000);
+            };
+            es.addEventListener('snapshot', e => {
+                resetView();
+                applyData(JSON.parse(e.data));
+            });
+            es.addEventListener('log', e => appendLogs([JSON.parse(e.data)]));
+            es.addEventListener('event', e => {
+                const d = JSON.parse(e.data);
+                upsertEvent(d.event);
+                applyMeta(d);
+            });
+            es.addEventListener('removed', e => {
+                const d = JSON.parse(e.data);
+                removeEvent(d.id);
+                applyMeta(d);
+            });
+            es.addEventListener('status', e => setRunning(JSON.parse(e.data).running));
+            es.addEventListener('alert', e => showAlert(JSON.parse(e.data)));
+        }
+
+        function showAlert(a) {
+            appendLogs([{line: `[ALERT] ${a.title} — ${a.message}`, level: 'ALERT'}]);
+            if (window.Notification && Notification.permission === 'granted') {
+                const n = new Notification(a.title, {body: a.message, tag: a.event_id || 'summary'});
+                if (a.url) n.onclick = () => window.open(a.url, '_blank');
+            }
+        }
+
+        function renderCard(el, evt) {
+            // Availability / Config Area
+            let contentHtml = '';
+            
+            if (evt.categories && evt.categories.length > 0) {
+                 let catList = evt.categories.map(c => `
+                    <div class="cat-item">
+                        <span>${c.name}</span>
+                        <span class="cat-price">${c.price}</span>
+                    </div>
+                 `).join('');
+                 contentHtml += `<div class="availability-box"><strong>Available Categories:</strong><br>${catList}</div>`;
+            } else if (evt.status !== 'booked') {
+                 contentHtml += `<div class="availability-box" style="color:#888; text-align:center; padding-top:20px;">
+                                    <i class="fas fa-ticket-alt" style="margin-bottom:5px;"></i><br>
+                                    Availability not checked
+                                 </div>`;
+            }
+
+            // Actions
+            let actionHtml = '';
+            if(evt.status === 'pending') {
+                actionHtml = `
+                    <div style="display:flex; gap:10px;">
+                        <button onclick="checkAvailability('${evt.id}')" class="outline" style="flex:1; font-size:0.8rem;"><i class="fas fa-search-dollar"></i> Check</button>
+                        <button onclick="activateEvent('${evt.id}')" style="flex:1; font-size:0.8rem;"><i class="fas fa-bolt"></i> Book</button>
+                    </div>
+                `;
+            } else if (evt.status === 'active') {
+                actionHtml = `<div style="color:var(--primary); margin-top:10px; text-align:center; font-weight:bold;"><i class="fas fa-circle-notch fa-spin"></i> Monitoring...</div>`;
+            } else if (evt.status === 'available') {
+                actionHtml = `<a href="${evt.url}" target="_blank" style="text-decoration:none;"><button class="stop" style="width:100%; margin-top:10px;"><i class="fas fa-ticket-alt"></i> TICKETS AVAILABLE</button></a>`;
+            } else if (evt.status === 'booked') {
+                actionHtml = `<div style="color:#0f0; margin-top:10px; text-align:center; font-weight:bold; font-size:1.1rem;"><i class="fas fa-check-circle"></i> HANDOVER</div>`;
+            }
+
+            el.innerHTML = `
+                <div class="header">
+                     <div class="platform">${evt.platform}</div>
+                     ${evt.date ? '<div style="font-size:0.8rem; color:#aaa;">'+evt.date+'</div>' : ''}
+                </div>
+                <h3>${evt.title}</h3>
+                <p><i class="fas fa-map-marker-alt"></i> ${evt.venue || 'Unknown Venue'}</p>
+                ${(evt.profiles || []).length ? '<div class="profile-tags">' + evt.profiles.map(p => `<span>${p}</span>`).join('') + '</div>' : ''}
+                
+                ${contentHtml}
+                ${actionHtml}
+            `;
+        }
+
+        function setRunning(running) {
+            const dot = document.getElementById('status-dot');
+            const text = document.getElementById('status-text');
+            if(running) {
+                dot.classList.add('active');
+                text.innerText = "SENSING";
+                text.style.color = "#00ff88";
+            } else {
+                dot.classList.remove('active');
+                text.innerText = "OFFLINE";
+                text.style.color = "#666";
+            }
+        }
+
+        function applyMeta(data) {
+            document.getElementById('stat-found').innerText = data.counts.total;
+            document.getElementById('stat-active').innerText = data.counts.active;
+            cursor.version = Math.max(cursor.version, data.version);
+
+            const grid = document.getElementById('event-grid');
+            let empty = document.getElementById('empty-grid');
+            if (cards.size === 0 && !empty) {
+                 grid.insertAdjacentHTML('beforeend', '<div id="empty-grid" style="grid-column:1/-1; text-align:center; padding:40px; color:#555;">No events found yet. Ensure Bot is initialized.</div>');
+            } else if (cards.size > 0 && empty) {
+                 empty.remove();
+            }
+        }
+
+        function appendLogs(logs) {
+            if (!logs.length) return;
+            const logPanel = document.getElementById('log-panel');
+            logs.forEach(log => {
+                const div = document.createElement('div');
+                const alert = log.level === 'ERROR' || log.level === 'ALERT' || log.line.includes('ALERT');
+                div.className = 'log-line ' + (alert ? 'alert' : log.level === 'FOUND' ? 'success' : '');
+                div.innerText = log.line;
+                logPanel.appendChild(div);
+            });
+            while (logPanel.childElementCount > 50) logPanel.removeChild(logPanel.firstChild);
+            logPanel.scrollTop = logPanel.scrollHeight;
+        }
+
+        function upsertEvent(evt) {
+            let el = cards.get(evt.id);
+            if (!el) {
+                el = document.createElement('div');
+                el.className = 'card event-card';
+                cards.set(evt.id, el);
+                document.getElementById('event-grid').appendChild(el);
+            }
+            renderCard(el, evt);
+        }
+
+        function removeEvent(id) {
+            const el = cards.get(id);
+            if (el) { el.remove(); cards.delete(id); }
+        }
+
+        function resetView() {
+            // Snapshots carry the full log buffer, so start the panel over
+            document.getElementById('log-panel').innerHTML = '';
+            cursor = { version: 0, logSeq: 0, etag: null };
+        }
+
+        function applyData(data) {
+            setRunning(data.running);
+
+            // Update Events: patch cards by id instead of rebuilding the grid
+            if (data.full) {
+                const keep = new Set(data.events.map(e => e.id));
+                for (const id of [...cards.keys()]) {
+                    if (!keep.has(id)) removeEvent(id);
+                }
+            }
+            data.removed.forEach(removeEvent);
+            data.events.forEach(upsertEvent);
+            appendLogs(data.logs);
+
+            applyMeta(data);
+            cursor.logSeq = data.log_seq;
+        }
+
+        async function pollData() {
+            try {
+                const headers = cursor.etag ? {'If-None-Match': cursor.etag} : {};
+                const res = await fetch(`/api/data?since_version=${cursor.version}&since_log_seq=${cursor.logSeq}`, {headers, cache: 'no-store'});
+                if (res.status === 304) return;
+                const data = await res.json();
+                cursor.etag = res.headers.get('ETag');
+                applyData(data);
+            } catch(e) { console.error(e); }
+        }
+
+        async function startBot() {
+            // Ask once, from a click, so alerts can show up outside the tab
+            if (window.Notification && Notification.permission === 'default') Notification.requestPermission();
+            await fetch('/api/start', {method:'POST'});
+        }
+        async function stopBot() { await fetch('/api/stop', {method:'POST'}); }
+        
+        async function updateSearch() {
+             const name = document.getElementById('s-profile').value.trim() || 'default';
+             const criteria = {
+                 match: document.getElementById('s-match').value,
+                 date: document.getElementById('s-date').value,
+                 venue: document.getElementById('s-venue').value,
+                 time: document.getElementById('s-time').value,
+                 tickets: document.getElementById('s-tickets').value,
+                 onsale: document.getElementById('s-onsale').value,
+                 budget: document.getElementById('s-budget').value
+             };
+             await fetch(`/api/profiles/${encodeURIComponent(name)}`, {
+                 method: 'PUT',
+                 headers: {'Content-Type': 'application/json'},
+                 body: JSON.stringify(criteria)
+             });
+             await loadProfiles();
+             alert(`Search profile '${name}' updated!`);
+        }
+
+        let profiles = {};
+        async function loadProfiles() {
+            profiles = await (await fetch('/api/profiles')).json();
+            const list = document.getElementById('profile-list');
+            list.innerHTML = '';
+            Object.entries(profiles).forEach(([name, p]) => {
+                const chip = document.createElement('span');
+                chip.className = 'profile-chip';
+                chip.title = p.match;
+                chip.innerHTML = `${name}<i class="fas fa-times del"></i>`;
+                chip.onclick = () => editProfile(name);
+                chip.querySelector('.del').onclick = (e) => { e.stopPropagation(); deleteProfile(name); };
+                list.appendChild(chip);
+            });
+        }
+
+        function editProfile(name) {
+            const p = profiles[name];
+            document.getElementById('s-profile').value = name;
+            document.getElementById('s-match').value = p.match || '';
+            document.getElementById('s-date').value = p.date || '';
+            document.getElementById('s-venue').value = p.venue || '';
+            document.getElementById('s-time').value = p.time || '';
+            document.getElementById('s-tickets').value = p.tickets || 2;
+            document.getElementById('s-onsale').value = p.onsale || '';
+            document.getElementById('s-budget').value = p.budget || '';
+        }
+
+        async function deleteProfile(name) {
+            if (!confirm(`Delete search profile '${name}'?`)) return;
+            await fetch(`/api/profiles/${encodeURIComponent(name)}`, {method: 'DELETE'});
+            await loadProfiles();
+        }
+
+        async function checkAvailability(id) {
+            // Trigger check
+             await fetch('/api/check_availability', {
+                 method: 'POST',
+                 headers: {'Content-Type': 'application/json'},
+                 body: JSON.stringify({id})
+             });
+        }
+
+        async function activateEvent(id) {
+            // For now, using global ticket count from search, or default 2
+            // In a fuller app, we might ask nicely again, but let's assume global config for speed
+            await fetch('/api/activate_event', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({id, qty: 2, price: 99999}) // logic simplified for demo
+            });
+        }
+
+        async function loadSources() {
+            try {
+                const stats = await (await fetch('/api/sources')).json();
+                const names = Object.keys(stats);
+                if (!names.length) return;
+                document.getElementById('source-stats').innerHTML = names.map(n => {
+                    const s = stats[n];
+                    return `<div style="display:flex; justify-content:space-between; margin-bottom:5px;" title="${s.changes}/${s.scans} scans changed">
+                                <span>${n} <span style="color:#555;">${s.backend} ${Math.round(s.fetch_ms)}ms</span></span>
+                                <span style="color:${s.changed ? 'var(--primary)' : '#666'};">${Math.round(s.change_rate * 100)}% · ${s.interval}s</span>
+                            </div>`;
+                }).join('');
+            } catch(e) { console.error(e); }
+        }
+
+        // Short labels for the latency panel; anything else is left out to keep it compact
+        const METRIC_LABELS = {
+            'bot_engine_merge_seconds': 'Engine merge',
+            'bot_add_event_seconds': 'add_event',
+            'bot_availability_queue_seconds': 'Check queue wait',
+            'bot_availability_check_seconds': 'Check run',
+            'bot_http_request_seconds get_data': '/api/data',
+        };
+
+        async function loadMetrics() {
+            try {
+                const m = await (await fetch('/api/metrics?format=json')).json();
+                const rows = Object.keys(m.latency).filter(k =>
+                    METRIC_LABELS[k] || k.startsWith('bot_navigation_seconds') || k.startsWith('bot_discovery_phase_seconds'));
+                if (!rows.length) return;
+                const label = k => METRIC_LABELS[k] || k.replace('bot_navigation_seconds', 'nav').replace('bot_discovery_phase_seconds', 'scan');
+                const swallowed = m.counters.bot_swallowed_errors_total || 0;
+                document.getElementById('metric-stats').innerHTML = rows.map(k => {
+                    const h = m.latency[k];
+                    return `<div style="display:flex; justify-content:space-between; margin-bottom:5px;" title="${h.count} samples, avg ${h.avg_ms}ms">
+                                <span>${label(k)}</span>
+                                <span style="color:#aaa;">${h.p50_ms ?? '-'} / ${h.p95_ms ?? '-'} ms</span>
+                            </div>`;
+                }).join('') + `<div style="display:flex; justify-content:space-between; margin-top:8px; color:#555;">
+                                <span>links ${m.counters.bot_links_scanned_total || 0} · checks ${m.counters.bot_availability_checks_total || 0}</span>
+                                <span style="color:${swallowed ? 'var(--accent)' : '#555'};">${swallowed} errors</span>
+                            </div>`;
+            } catch(e) { console.error(e); }
+        }
+
+        connectStream();
+        loadProfiles();
+        loadSources();
+        loadMetrics();
+        setInterval(loadSources, 5000);
+        setInterval(loadMetrics, 5000);
+    </script>
+</body>
+</html>
+'''
+
+# --- BACKEND LOGIC ---
+class StreamClient:
+    # Per-dashboard bounded buffer. A client that falls more than maxlen messages behind
+    # is dropped to an "overflowed" state and gets a fresh snapshot instead of a backlog.
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.buf = deque()
+        self.overflowed = False
+        self.cond = threading.Condition()
+
+    def push(self, msg):
+        with self.cond:
+            if len(self.buf) >= self.maxlen:
+                self.buf.clear()
+                self.overflowed = True
+            else:
+                self.buf.append(msg)
+            self.cond.notify()
+
+    def next_batch(self, timeout):
+        # Returns (messages, overflowed); empty list on timeout
+        with self.cond:
+            if not self.buf and not self.overflowed:
+                self.cond.wait(timeout)
+            msgs = list(self.buf)
+            self.buf.clear()
+            overflowed, self.overflowed = self.overflowed, False
+            return msgs, overflowed
+
+class Broadcaster:
+    # Single fan-out for every /api/stream client: a message is serialised once and
+    # handed to each client's buffer. The last `history` messages are kept so a
+    # reconnecting EventSource can resume from its Last-Event-ID.
+    def __init__(self, history=500, client_buffer=200):
+        self.client_buffer = client_buffer
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history = deque(maxlen=history) # (id, kind, json)
+        self._clients = set()
+
+    def publish(self, kind, data):
+        payload = json.dumps(data)
+        with self._lock:
+            self._seq += 1
+            msg = (self._seq, kind, payload)
+            self._history.append(msg)
+            for c in self._clients: c.push(msg)
+
+    def subscribe(self, last_id=None):
+        # Returns (client, seq, resumed). resumed is False when the caller has to send a
+        # snapshot first (fresh connection, or last_id has fallen out of history).
+        client = StreamClient(self.client_buffer)
+        with self._lock:
+            resumed = False
+            if last_id is not None and last_id <= self._seq:
+                oldest = self._history[0][0] if self._history else self._seq + 1
+                if last_id >= oldest - 1:
+                    resumed = True
+                    client.buf.extend(msg for msg in self._history if msg[0] > last_id)
+            self._clients.add(client)
+            return client, self._seq, resumed
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def client_count(self):
+        return len(self._clients)
+
+broadcaster = Broadcaster()
+
+class LogPipeline:
+    # Structured records {seq, ts, level, source, event_id, msg, line} in a fixed-size ring.
+    # emit() only enqueues; a background thread assigns sequence numbers, fills the ring,
+    # pushes to the stream and echoes to stdout through a token bucket, so neither the
+    # engine nor a request handler ever does the drain work.
+    def __init__(self, capacity=LOG_CAPACITY, stdout_rate=LOG_STDOUT_RATE):
+        self.ring = deque(maxlen=capacity)
+        self.seq = 0
+        self.epoch = 0
+        self.stdout_rate = stdout_rate
+        self._tokens = stdout_rate * 2
+        self._refill_at = time.monotonic()
+        self._suppressed = 0
+        self._intake = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._drain = threading.Thread(target=self._drain_loop, name="log-drain", daemon=True)
+        self._drain.start()
+
+    def emit(self, msg, level="INFO", source="engine", event_id=None):
+        self._intake.put((time.time(), level, source, event_id, msg))
+
+    def _drain_loop(self):
+        while True:
+            ts, level, source, event_id, msg = self._intake.get()
+            stamp = datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+            line = f"[{stamp}] {msg}" if source == "engine" else f"[{stamp}] [{source.title()}] {msg}"
+            with self._lock:
+                self.seq += 1
+                rec = {"seq": self.seq, "ts": ts, "level": level, "source": source,
+                       "event_id": event_id, "msg": msg, "line": line}
+                self.ring.append(rec)
+            broadcaster.publish("log", rec)
+            self._echo(line)
+
+    def _echo(self, line):
+        if self.stdout_rate <= 0:
+            print(line)
+            return
+        now = time.monotonic()
+        self._tokens = min(self.stdout_rate * 2, self._tokens + (now - self._refill_at) * self.stdout_rate)
+        self._refill_at = now
+        if self._tokens < 1:
+            self._suppressed += 1
+            return
+        self._tokens -= 1
+        if self._suppressed:
+            print(f"... {self._suppressed} log lines not echoed (rate limit)")
+            self._suppressed = 0
+        print(line)
+
+    def since(self, seq, limit=None):
+        # Returns (current seq, records after seq). Ring seqs are contiguous, so the
+        # start index is arithmetic rather than a scan.
+        with self._lock:
+            if not self.ring: return self.seq, []
+            first = self.ring[0]["seq"]
+            start = max(0, seq + 1 - first)
+            if limit is not None: start = max(start, len(self.ring) - limit)
+            return self.seq, [self.ring[i] for i in range(start, len(self.ring))]
+
+    def clear(self):
+        with self._lock:
+            self.ring.clear()
+            self.epoch += 1 # same seq, different contents: lets caches notice
+
+    def flush(self, timeout=1.0):
+        # Wait for the drain thread to catch up (startup/shutdown and tests)
+        deadline = time.time() + timeout
+        while not self._intake.empty() and time.time() < deadline:
+            time.sleep(0.005)
+
+log_pipeline = LogPipeline()
+
+# --- METRICS ---
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation (good enough for a panel)
+        if not self.count: return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank: return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+
+class Metrics:
+    # Process-wide counters, latency histograms and gauges. Series are keyed by
+    # (name, sorted label items); recording is a dict lookup, a bisect and an add under
+    # one lock. Gauges are callbacks evaluated only when someone reads the metrics.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {} # name -> (help, fn returning a number or {label_value: number})
+        self.help = {}
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None: h = self.histograms[key] = Histogram()
+            h.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            h.sum += seconds
+            h.count += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        t0 = time.perf_counter()
+        try: yield
+        finally: self.observe(name, time.perf_counter() - t0, **labels)
+
+    def gauge(self, name, help, fn, label=None):
+        # fn() returns a number, or {value of `label`: number} for a labelled gauge
+        self.gauges[name] = (help, fn, label)
+
+    def swallowed(self, where):
+        # For the places that deliberately carry on after an error
+        self.inc("bot_swallowed_errors_total", where=where)
+
+    def _read_gauges(self):
+        out = []
+        for name, (help, fn, label) in self.gauges.items():
+            try: value = fn()
+            except Exception: continue
+            if isinstance(value, dict):
+                out.extend((name, help, ((label, k),), v) for k, v in value.items())
+            else:
+                out.append((name, help, (), value))
+        return out
+
+    def prometheus(self):
+        # Text exposition format 0.0.4
+        def fmt_labels(items):
+            if not items: return ""
+            return "{" + ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in items) + "}"
+        with self._lock:
+            counters = sorted(self.counters.items())
+            hists = sorted((k, (list(h.counts), h.sum, h.count)) for k, h in self.histograms.items())
+        lines, typed = [], set()
+        def header(name, kind, help=None):
+            if name in typed: return
+            typed.add(name)
+            lines.append(f"# HELP {name} {help or self.help.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{fmt_labels(labels)} {value}")
+        for (name, labels), (counts, total, count) in hists:
+            header(name, "histogram")
+            cum = 0
+            for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), counts):
+                cum += n
+                lines.append(f"{name}_bucket{fmt_labels(labels + (('le', bound),))} {cum}")
+            lines.append(f"{name}_sum{fmt_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{fmt_labels(labels)} {count}")
+        for name, help, labels, value in self._read_gauges():
+            header(name, "gauge", help)
+            lines.append(f"{name}{fmt_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        # Compact view for the dashboard: latencies in ms
+        with self._lock:
+            hists = {(name + "".join(f" {v}" for _, v in labels)): (h.count, h.sum, h.quantile(0.5), h.quantile(0.95))
+                     for (name, labels), h in self.histograms.items()}
+            counters = {}
+            for (name, _), value in self.counters.items():
+                counters[name] = counters.get(name, 0) + value
+        ms = lambda s: None if s is None else (round(s * 1000, 2) if s != float("inf") else None)
+        return {
+            "latency": {k: {"count": c, "avg_ms": round(total / c * 1000, 2), "p50_ms": ms(p50), "p95_ms": ms(p95)}
+                        for k, (c, total, p50, p95) in sorted(hists.items())},
+            "counters": counters,
+            "gauges": {name + "".join(f" {v}" for _, v in labels): value for name, _, labels, value in self._read_gauges()}
+        }
+
+metrics = Metrics()
+for _name, _text in [
+    ("bot_navigation_seconds", "driver.get() wall time by browser mode"),
+    ("bot_discovery_phase_seconds", "Discovery scan phases (fetch, extract, match) per source"),
+    ("bot_links_scanned_total", "Listing links looked at per source"),
+    ("bot_discovery_scans_total", "Discovery scans per source and backend"),
+    ("bot_discovery_errors_total", "Failed discovery scans per source"),
+    ("bot_engine_merge_seconds", "Engine loop: merging one drained batch of matches"),
+    ("bot_add_event_seconds", "BotEngine.add_event"),
+    ("bot_events_added_total", "New events stored, by platform"),
+    ("bot_availability_queue_seconds", "Availability check wait before a worker picked it up"),
+    ("bot_availability_check_seconds", "Availability check run time"),
+    ("bot_availability_phase_seconds", "Availability check phases (lease, navigate, ready) by platform"),
+    ("bot_availability_requests_total", "Availability requests by outcome"),
+    ("bot_availability_checks_total", "Availability checks run, by result"),
+    ("bot_http_request_seconds", "API request handling time by endpoint (time to headers for streams)"),
+    ("bot_http_requests_total", "API requests by endpoint and status"),
+    ("bot_swallowed_errors_total", "Errors deliberately ignored, by location"),
+    ("bot_alert_latency_seconds", "Store change to alert delivered, by sink"),
+    ("bot_alerts_total", "Alerts delivered, by leading reason"),
+    ("bot_alerts_coalesced_total", "Event changes folded into another alert for the same event"),
+    ("bot_alert_failures_total", "Alert deliveries that raised, by sink"),
+]: metrics.describe(_name, _text)
+
+# State
+DEFAULT_PROFILE = {
+    "match": "Cricket",
+    "date": "",
+    "venue": "",
+    "time": "",
+    "tickets": 2,
+    "onsale": "", # optional ISO datetime when tickets open, tightens scanning around it
+    "budget": "" # optional max price per ticket; a category at or under it raises an alert
+}
+state = {
+    "running": False,
+    # Named search profiles, all matched in the same pass over every listing.
+    # Replaced wholesale (never mutated in place) so readers can iterate it safely.
+    "profiles": {"default": dict(DEFAULT_PROFILE)}
+}
+# Writers of state (start/stop, profile edits) take this; readers never need it since
+# every value in state is swapped, not mutated
+state_lock = threading.RLock()
+
+class StoreSnapshot:
+    # Immutable view of the EventStore at one version. The event dicts are shared with
+    # the store, which never mutates a dict once it's published (update() swaps in a new
+    # one), so a snapshot can be read and serialised from any thread without a lock.
+    __slots__ = ("version", "events", "counts")
+
+    def __init__(self, version, events, counts):
+        self.version = version
+        self.events = events # tuple, insertion order
+        self.counts = counts # {"total": n, <status>: n, ...}
+
+class EventStore:
+    # Single owner of discovered events: {id, title, url, platform, status, venue, date, categories: []}
+    # Primary indexes (id, url) are O(1) dict lookups; status/platform keep id sets so
+    # the engine never has to walk the whole collection to find what it needs.
+    # Every mutation bumps a store-wide version; _changes keeps ids ordered by the version
+    # of their last change so changes_since() only touches what actually changed.
+    # Events are copy-on-write: writers replace the dict under the lock, readers take
+    # snapshot() (lock-free once published) instead of copying under the lock.
+    TOMBSTONES = 1000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_id = {}
+        self._by_url = {}
+        self._by_status = {}
+        self._by_platform = {}
+        self.version = 0
+        self._changes = OrderedDict() # id -> version of last change (oldest first)
+        self._removed = OrderedDict() # id -> version it was removed at
+        self._horizon = 0 # cursors older than this can't be served incrementally
+        self._listeners = [] # fn(kind, payload) called under the lock, in version order;
+                             # kind is "added", "event" (updated) or "removed"
+        self._snapshot = StoreSnapshot(0, (), {"total": 0})
+
+    def subscribe(self, fn):
+        self._listeners.append(fn)
+
+    def _notify(self, kind, payload):
+        for fn in self._listeners:
+            try: fn(kind, payload)
+            except Exception: traceback.print_exc()
+
+    def _touch(self, event_id, removed=False):
+        self.version += 1
+        self._changes.pop(event_id, None)
+        if removed:
+            self._removed[event_id] = self.version
+            while len(self._removed) > self.TOMBSTONES:
+                _, v = self._removed.popitem(last=False)
+                self._horizon = v
+        else:
+            self._changes[event_id] = self.version
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, event_id):
+        return event_id in self._by_id
+
+    def has_url(self, url):
+        return url in self._by_url
+
+    def add(self, title, url, platform, **fields):
+        # Returns the stored event, or None if the url is already known
+        with self._lock:
+            if url in self._by_url: return None
+            evt = {
+                "id": f"evt_{int(time.time()*1000)}_{random.randint(100,999)}",
+                "title": title,
+                "url": url,
+                "platform": platform,
+                "status": "pending",
+                "venue": "Unknown", # Would need deeper scraping
+                "date": "Upcoming",
+                "categories": []
+            }
+            evt.update(fields)
+            while evt['id'] in self._by_id:
+                evt['id'] = f"evt_{int(time.time()*1000)}_{random.randint(100,999)}"
+            self._index(evt)
+            self._notify("added", dict(evt))
+            return dict(evt)
+
+    def _index(self, evt):
+        self._by_id[evt['id']] = evt
+        self._by_url[evt['url']] = evt['id']
+        self._by_status.setdefault(evt['status'], set()).add(evt['id'])
+        self._by_platform.setdefault(evt['platform'], set()).add(evt['id'])
+        self._touch(evt['id'])
+
+    def load(self, events):
+        # Bulk insert of already-known events (rehydration); listeners are not told, so
+        # nothing gets written straight back to where the events came from
+        with self._lock:
+            n = 0
+            for evt in events:
+                if evt['id'] in self._by_id or evt['url'] in self._by_url: continue
+                self._index(dict(evt))
+                n += 1
+            return n
+
+    def get(self, event_id):
+        with self._lock:
+            evt = self._by_id.get(event_id)
+            return dict(evt) if evt else None
+
+    def get_by_url(self, url):
+        with self._lock:
+            eid = self._by_url.get(url)
+            return dict(self._by_id[eid]) if eid else None
+
+    def update(self, event_id, **fields):
+        # Replace an event with an updated copy, keeping the secondary indexes in sync
+        with self._lock:
+            evt = self._by_id.get(event_id)
+            if not evt: return None
+            if 'id' in fields or 'url' in fields:
+                raise ValueError("id and url are immutable")
+            if 'status' in fields and fields['status'] != evt['status']:
+                self._by_status[evt['status']].discard(event_id)
+                self._by_status.setdefault(fields['status'], set()).add(event_id)
+            if 'platform' in fields and fields['platform'] != evt['platform']:
+                self._by_platform[evt['platform']].discard(event_id)
+                self._by_platform.setdefault(fields['platform'], set()).add(event_id)
+            evt = {**evt, **fields}
+            self._by_id[event_id] = evt
+            self._touch(event_id)
+            self._notify("event", dict(evt))
+            return dict(evt)
+
+    def set_status(self, event_id, status):
+        return self.update(event_id, status=status)
+
+    def remove(self, event_id):
+        with self._lock:
+            evt = self._by_id.pop(event_id, None)
+            if not evt: return None
+            del self._by_url[evt['url']]
+            self._by_status[evt['status']].discard(event_id)
+            self._by_platform[evt['platform']].discard(event_id)
+            self._touch(event_id, removed=True)
+            self._notify("removed", event_id)
+            return evt
+
+    def by_status(self, status):
+        with self._lock:
+            return [dict(self._by_id[i]) for i in self._by_status.get(status, ())]
+
+    def by_platform(self, platform):
+        with self._lock:
+            return [dict(self._by_id[i]) for i in self._by_platform.get(platform, ())]
+
+    def count(self, status=None, platform=None):
+        with self._lock:
+            if status is None and platform is None: return len(self._by_id)
+            ids = None
+            if status is not None: ids = self._by_status.get(status, set())
+            if platform is not None:
+                pids = self._by_platform.get(platform, set())
+                ids = pids if ids is None else ids & pids
+            return len(ids)
+
+    def all(self):
+        # Copies in insertion order, for callers that want to modify what they get
+        return [dict(e) for e in self.snapshot().events]
+
+    def snapshot(self):
+        # Built at most once per version, by the first reader after a write, so a burst
+        # of writes doesn't pay for a rebuild each and idle polls just compare versions
+        snap = self._snapshot
+        if snap.version == self.version: return snap
+        with self._lock:
+            if self._snapshot.version != self.version:
+                counts = {st: len(ids) for st, ids in self._by_status.items()}
+                counts["total"] = len(self._by_id)
+                self._snapshot = StoreSnapshot(self.version, tuple(self._by_id.values()), counts)
+            return self._snapshot
+
+    def changes_since(self, since):
+        # Returns (version, changed events, removed ids), or (version, None, None) when
+        # the cursor predates the tombstone horizon and the caller needs a full resync
+        with self._lock:
+            if since < self._horizon: return self.version, None, None
+            changed = []
+            for eid in reversed(self._changes):
+                if self._changes[eid] <= since: break
+                changed.append(self._by_id[eid]) # never mutated, safe to hand out
+            changed.reverse()
+            removed = []
+            for eid in reversed(self._removed):
+                if self._removed[eid] <= since: break
+                removed.append(eid)
+            return self.version, changed, removed
+
+event_store = EventStore()
+
+def stream_event_change(kind, payload):
+    # Runs under the store lock, so version and counts match the change being sent
+    counts = {"total": event_store.count(), "active": event_store.count(status='active')}
+    if kind == "removed":
+        broadcaster.publish("removed", {"version": event_store.version, "id": payload, "counts": counts})
+    else:
+        broadcaster.publish("event", {"version": event_store.version, "event": payload, "counts": counts})
+
+event_store.subscribe(stream_event_change)
+
+# --- PERSISTENCE ---
+class SqliteBacking:
+    # Optional on-disk copy of the store. The hot path only enqueues; a writer thread
+    # owns the write connection and commits batches in one transaction each, coalescing
+    # repeated upserts of the same event. Readers get their own WAL connections.
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS events (
+        id TEXT PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        title TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        status TEXT NOT NULL,
+        data TEXT NOT NULL,
+        updated REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS events_status ON events(status);
+    CREATE INDEX IF NOT EXISTS events_platform ON events(platform);
+    CREATE TABLE IF NOT EXISTS availability (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id TEXT NOT NULL,
+        ts REAL NOT NULL,
+        categories TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS availability_event ON availability(event_id, ts);
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    '''
+
+    def __init__(self, path, flush_interval=DB_FLUSH_INTERVAL, batch_size=DB_BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._ops = queue.SimpleQueue()
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        conn.commit()
+        self._writer = threading.Thread(target=self._write_loop, args=(conn,), name="sqlite-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # -- writes (non-blocking) --
+    def on_store_change(self, kind, payload):
+        if kind == "removed": self._ops.put(("delete", payload))
+        else: self._ops.put(("upsert", payload))
+
+    def record_availability(self, event_id, categories):
+        self._ops.put(("snapshot", (event_id, time.time(), json.dumps(categories))))
+
+    def save_setting(self, key, value):
+        self._ops.put(("setting", (key, json.dumps(value))))
+
+    def flush(self, timeout=5.0):
+        done = threading.Event()
+        self._ops.put(("flush", done))
+        return done.wait(timeout)
+
+    def _write_loop(self, conn):
+        while True:
+            batch = [self._ops.get()]
+            deadline = time.time() + self.flush_interval
+            waiters = []
+            while len(batch) < self.batch_size:
+                if batch[-1][0] == "flush": break
+                remaining = deadline - time.time()
+                if remaining <= 0: break
+                try: batch.append(self._ops.get(timeout=remaining))
+                except queue.Empty: break
+            upserts, deletes, snapshots, settings = {}, set(), [], {}
+            for op, arg in batch:
+                if op == "upsert":
+                    upserts[arg['id']] = arg
+                    deletes.discard(arg['id'])
+                elif op == "delete":
+                    upserts.pop(arg, None)
+                    deletes.add(arg)
+                elif op == "snapshot": snapshots.append(arg)
+                elif op == "setting": settings[arg[0]] = arg[1]
+                elif op == "flush": waiters.append(arg)
+            try:
+                with conn:
+                    now = time.time()
+                    conn.executemany(
+                        "INSERT INTO events (id, url, title, platform, status, data, updated) VALUES (?,?,?,?,?,?,?) "
+                        "ON CONFLICT(id) DO UPDATE SET title=excluded.title, platform=excluded.platform, "
+                        "status=excluded.status, data=excluded.data, updated=excluded.updated",
+                        [(e['id'], e['url'], e['title'], e['platform'], e['status'], json.dumps(e), now) for e in upserts.values()])
+                    conn.executemany("DELETE FROM events WHERE id=?", [(i,) for i in deletes])
+                    conn.executemany("INSERT INTO availability (event_id, ts, categories) VALUES (?,?,?)", snapshots)
+                    conn.executemany("INSERT INTO settings (key, value) VALUES (?,?) "
+                                     "ON CONFLICT(key) DO UPDATE SET value=excluded.value", list(settings.items()))
+            except Exception:
+                traceback.print_exc()
+            for done in waiters: done.set()
+
+    # -- reads --
+    def load_events(self):
+        rows = self._reader().execute("SELECT data FROM events ORDER BY rowid")
+        return [json.loads(data) for (data,) in rows]
+
+    def events_by_status(self, status):
+        rows = self._reader().execute("SELECT data FROM events WHERE status=?", (status,))
+        return [json.loads(data) for (data,) in rows]
+
+    def event_by_url(self, url):
+        row = self._reader().execute("SELECT data FROM events WHERE url=?", (url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def availability_history(self, event_id, limit=100):
+        rows = self._reader().execute(
+            "SELECT ts, categories FROM availability WHERE event_id=? ORDER BY ts DESC LIMIT ?", (event_id, limit))
+        return [{"ts": ts, "categories": json.loads(cats)} for ts, cats in rows]
+
+    def load_setting(self, key, default=None):
+        row = self._reader().execute("SELECT value FROM settings WHERE key=?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+persistence = None
+
+def open_persistence(path=DB_PATH):
+    # Rehydrate the in-memory store from disk, then keep the disk copy in sync
+    global persistence
+    if not path: return None
+    persistence = SqliteBacking(path)
+    n = event_store.load(persistence.load_events())
+    profiles = persistence.load_setting("profiles")
+    if profiles is None:
+        # Databases written before profiles existed only have the one search
+        search = persistence.load_setting("search")
+        if search: profiles = {"default": search}
+    if profiles is not None: state['profiles'] = profiles
+    rebuild_matcher()
+    event_store.subscribe(persistence.on_store_change)
+    print(f"Loaded {n} events from {path}")
+    return persistence
+
+def record_availability(event_id, categories):
+    if persistence: persistence.record_availability(event_id, categories)
+bot_thread = None
+stop_event = threading.Event()
+
+# One round trip for every anchor on the page: [[href, text, title], ...]
+# (per-element get_attribute/.text costs 2-3 chromedriver calls per link)
+EXTRACT_ANCHORS_JS = '''
+const out = [];
+for (const a of document.getElementsByTagName('a')) {
+    const href = a.href;
+    if (!href) continue;
+    out.push([href, (a.innerText || '').trim(), a.getAttribute('title') || '']);
+}
+return out;
+'''
+
+def extract_anchors(driver):
+    # Returns [(href, title)] where title falls back to the title attribute like l.text or l.get_attribute("title")
+    # innerText puts newlines between block elements; collapse them like parse_anchors does
+    raw = driver.execute_script(EXTRACT_ANCHORS_JS) or []
+    out = []
+    for href, text, title in raw:
+        title = " ".join(text.split()) or title
+        if title: out.append((href, title))
+    return out
+
+# --- BROWSER PROFILES ---
+# Every long-lived browser gets its own --user-data-dir under PROFILE_DIR (scan-<source>,
+# monitor, pool-<slot>), so HTTP cache, cookies and site settings such as the chosen
+# city survive restarts. Chrome locks a profile while it runs, which is why pool
+# drivers lease numbered slots instead of sharing one directory.
+# Regenerable caches: dropped first when a profile outgrows PROFILE_MAX_MB
+PROFILE_CACHE_DIRS = ["Default/Cache", "Default/Code Cache", "Default/GPUCache", "Default/Service Worker/CacheStorage",
+                      "Default/Service Worker/ScriptCache", "GrShaderCache", "GraphiteDawnCache", "ShaderCache"]
+PROFILE_LOCKS = ["SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile"]
+
+def profile_path(name):
+    if not PROFILE_DIR or not name: return None
+    return os.path.abspath(os.path.join(PROFILE_DIR, name))
+
+def dir_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try: total += os.lstat(os.path.join(root, f)).st_size
+            except OSError: pass
+    return total / (1024 * 1024)
+
+def pid_alive(pid):
+    # POSIX only (os.kill(pid, 0) would terminate the process on Windows)
+    try: os.kill(pid, 0)
+    except ProcessLookupError: return False
+    except PermissionError: return True
+    except OSError: return False
+    return True
+
+def profile_in_use(path):
+    # Chrome holds SingletonLock (lockfile on Windows) for as long as it has the profile
+    # open. SingletonLock is a symlink to "<host>-<pid>", so a crashed Chrome's leftover
+    # can be told apart; one from another host can't, and counts as in use.
+    try: target = os.readlink(os.path.join(path, "SingletonLock"))
+    except OSError: target = None
+    if target:
+        host, _, pid = target.rpartition("-")
+        if host != socket.gethostname() or not pid.isdigit() or pid_alive(int(pid)): return True
+    # Windows keeps lockfile open while running; a stale one is only found by deleting it
+    return os.name == "nt" and os.path.exists(os.path.join(path, "lockfile"))
+
+def trim_profile(name, max_mb=PROFILE_MAX_MB):
+    # Drop caches once a profile is over max_mb; if cookies/storage alone are still over,
+    # start it from scratch (exported cookies are re-applied by the next browser anyway).
+    # Returns (size before, size after) in MB.
+    path = profile_path(name)
+    before = dir_size_mb(path)
+    if before <= max_mb: return before, before
+    for d in PROFILE_CACHE_DIRS: shutil.rmtree(os.path.join(path, d), ignore_errors=True)
+    after = dir_size_mb(path)
+    if after > max_mb:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+        after = 0.0
+    log_pipeline.emit(f"Browser profile '{name}' trimmed {before:.0f} -> {after:.0f} MB", source="browser")
+    return before, after
+
+def prepare_profile(name):
+    # Called right before Chrome starts on the profile, i.e. while nothing has it open
+    path = profile_path(name)
+    if not path: return None
+    os.makedirs(path, exist_ok=True)
+    # Another bot instance (or an orphaned Chrome) still running on the profile: opening
+    # it a second time would corrupt it, so refuse instead of breaking the lock
+    busy = RuntimeError(f"Browser profile '{name}' is in use by another Chrome ({path})")
+    if os.name != "nt" and profile_in_use(path): raise busy
+    # Otherwise the locks were left behind by a Chrome that crashed or was killed
+    for f in PROFILE_LOCKS:
+        try: os.unlink(os.path.join(path, f))
+        except FileNotFoundError: pass
+        except PermissionError:
+            # Windows won't delete lockfile while its Chrome has it open
+            if f == "lockfile": raise busy
+        except OSError: pass
+    trim_profile(name)
+    return path
+
+def profile_warm(name, ttl=PROFILE_WARM_TTL):
+    # True if the profile went through a site warm-up within ttl seconds
+    path = profile_path(name)
+    if not path: return False
+    try: return time.time() - os.path.getmtime(os.path.join(path, ".bot_warmed")) < ttl
+    except OSError: return False
+
+def mark_profile_warm(name):
+    path = profile_path(name)
+    if not path: return
+    with open(os.path.join(path, ".bot_warmed"), "w") as f: f.write(datetime.now().isoformat())
+
+def list_browser_profiles():
+    if not PROFILE_DIR or not os.path.isdir(PROFILE_DIR): return []
+    out = []
+    for name in sorted(os.listdir(PROFILE_DIR)):
+        path = profile_path(name)
+        if name == "cookies" or not os.path.isdir(path): continue
+        out.append({"name": name, "size_mb": round(dir_size_mb(path), 1), "in_use": profile_in_use(path), "warm": profile_warm(name)})
+    return out
+
+# Fields Network.setCookies accepts
+CDP_COOKIE_FIELDS = {"name", "value", "url", "domain", "path", "secure", "httpOnly", "sameSite", "expires", "priority",
+                     "sameParty", "sourceScheme", "sourcePort", "partitionKey"}
+
+class CookieJar:
+    # Exported cookies per platform, as JSON in PROFILE_DIR/cookies (memory only without a
+    # PROFILE_DIR). Each put() bumps the platform's version; browsers re-apply cookies
+    # when theirs is behind, from the thread that owns the browser.
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._cookies = {}
+        self._versions = {}
+        if root and os.path.isdir(root):
+            for f in os.listdir(root):
+                if not f.endswith(".json"): continue
+                try:
+                    with open(os.path.join(root, f)) as fh: self._cookies[f[:-5]] = json.load(fh)
+                    self._versions[f[:-5]] = 1
+                except (OSError, ValueError): pass
+
+    def platforms(self):
+        with self._lock:
+            return {p: len(c) for p, c in self._cookies.items()}
+
+    def get(self, platform):
+        with self._lock:
+            return list(self._cookies.get(platform, []))
+
+    def version(self, platform):
+        return self._versions.get(platform, 0)
+
+    def put(self, platform, cookies, base=None):
+        # base: the version a browser export started from. If the jar has moved on since
+        # (an import or delete the browser hasn't applied yet), the export is dropped
+        # and None returned, so a stale browser can't overwrite newer cookies.
+        with self._lock:
+            if base is not None and base != self._versions.get(platform, 0): return None
+            self._cookies[platform] = list(cookies)
+            self._versions[platform] = self._versions.get(platform, 0) + 1
+            if self.root:
+                os.makedirs(self.root, exist_ok=True)
+                tmp = os.path.join(self.root, f"{platform}.json.tmp")
+                with open(tmp, "w") as fh: json.dump(self._cookies[platform], fh)
+                os.replace(tmp, os.path.join(self.root, f"{platform}.json"))
+            return self._versions[platform]
+
+    def delete(self, platform):
+        with self._lock:
+            self._cookies.pop(platform, None)
+            self._versions[platform] = self._versions.get(platform, 0) + 1
+            if self.root:
+                try: os.unlink(os.path.join(self.root, f"{platform}.json"))
+                except OSError: pass
+
+cookie_jar = CookieJar(os.path.join(PROFILE_DIR, "cookies") if PROFILE_DIR else None)
+
+def cdp_cookie(c):
+    # Accepts CDP cookies and selenium's get_cookies() shape ('expiry')
+    c = dict(c)
+    if 'expiry' in c: c['expires'] = c.pop('expiry')
+    if c.get('session') or (c.get('expires') or 0) <= 0: c.pop('expires', None)
+    return {k: v for k, v in c.items() if k in CDP_COOKIE_FIELDS}
+
+def load_cookies(driver, platform):
+    # Apply the platform's exported cookies to this browser, without navigating
+    version = cookie_jar.version(platform)
+    cookies = cookie_jar.get(platform)
+    if cookies: driver.execute_cdp_cmd("Network.setCookies", {"cookies": [cdp_cookie(c) for c in cookies]})
+    applied = getattr(driver, "bot_cookies", None)
+    if applied is None: applied = driver.bot_cookies = {}
+    applied[platform] = version
+
+def sync_cookies(driver, platform):
+    # load_cookies() only if the jar changed since this browser last applied it
+    if getattr(driver, "bot_cookies", {}).get(platform) == cookie_jar.version(platform): return
+    try: load_cookies(driver, platform)
+    except Exception: metrics.swallowed("load_cookies")
+
+def save_cookies(driver, platform, domain):
+    # Export this browser's cookies for one site (domain suffix) into the jar
+    cookies = driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+    mine = [c for c in cookies if c.get("domain", "").lstrip(".").endswith(domain)]
+    applied = getattr(driver, "bot_cookies", {})
+    version = cookie_jar.put(platform, mine, base=applied.get(platform, 0))
+    if version is None: return 0
+    applied[platform] = version
+    return len(mine)
+
+# --- BROWSERS ---
+# Requests a lean browser never makes: static media and third-party ad/analytics hosts
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*", "*adservice.google.*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*analytics.google.com*",
+    "*facebook.net*", "*connect.facebook.*", "*hotjar.com*", "*clarity.ms*", "*criteo.*",
+    "*taboola.com*", "*outbrain.com*", "*amazon-adsystem.com*", "*moengage.com*",
+    "*branch.io*", "*segment.io*", "*mixpanel.com*", "*newrelic.com*", "*nr-data.net*",
+]
+
+def chrome_version():
+    # Installed Chrome's version string, or None if it can't be found
+    if sys.platform == "win32":
+        try:
+            import winreg
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Google\Chrome\BLBeacon")
+            return winreg.QueryValueEx(key, "version")[0]
+        except OSError:
+            return None
+    cmds = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+    if sys.platform == "darwin":
+        cmds.insert(0, "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome")
+    for cmd in cmds:
+        try:
+            out = subprocess.run([cmd, "--version"], capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        m = re.search(r"\d+(?:\.\d+)+", out)
+        if m: return m.group(0)
+    return None
+
+chromedriver_path = None
+chromedriver_lock = threading.Lock()
+
+def resolve_chromedriver(refresh=False):
+    # ChromeDriverManager().install() costs a version lookup (often a network round
+    # trip) every call. Resolve once per process, and reuse the path from the disk
+    # cache across runs as long as the file is still there and Chrome hasn't updated.
+    global chromedriver_path
+    with chromedriver_lock:
+        if chromedriver_path and not refresh: return chromedriver_path
+        version = chrome_version()
+        if not refresh:
+            try:
+                with open(CHROMEDRIVER_CACHE) as f: cached = json.load(f)
+                if cached.get("chrome_version") == version and os.path.exists(cached.get("path", "")):
+                    chromedriver_path = cached["path"]
+                    return chromedriver_path
+            except (OSError, ValueError): pass
+        from webdriver_manager.chrome import ChromeDriverManager
+        chromedriver_path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(CHROMEDRIVER_CACHE) or ".", exist_ok=True)
+            with open(CHROMEDRIVER_CACHE, "w") as f:
+                json.dump({"chrome_version": version, "path": chromedriver_path, "resolved_at": time.time()}, f)
+        except OSError: pass
+        return chromedriver_path
+
+def build_chrome_options(mode, profile_dir=None):
+    from selenium import webdriver
+    opts = webdriver.ChromeOptions()
+    opts.add_argument(f"user-agent={USER_AGENT}")
+    if profile_dir: opts.add_argument(f"--user-data-dir={profile_dir}")
+    if mode == "visible":
+        # Full Chrome window, everything loaded: what the sites see from a person
+        return opts
+    opts.add_argument("--headless=new")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--disable-extensions")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--mute-audio")
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_argument("--renderer-process-limit=4")
+    opts.add_argument(f"--js-flags=--max-old-space-size={RENDERER_HEAP_MB}")
+    opts.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_values.geolocation": 2,
+    })
+    # get() returns at DOMContentLoaded; readiness is decided by wait_ready()
+    opts.page_load_strategy = "eager"
+    if mode == "monitor":
+        # Background tabs must keep loading and running at full speed
+        opts.add_argument("--disable-background-timer-throttling")
+        opts.add_argument("--disable-renderer-backgrounding")
+        opts.add_argument("--disable-backgrounding-occluded-windows")
+        # Don't block on navigations: reloads are fired and read back on the next round
+        opts.page_load_strategy = "none"
+    return opts
+
+def new_driver(mode="scan", profile=None):
+    # profile: name of a persistent profile under PROFILE_DIR, None for a throwaway one
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.common.exceptions import WebDriverException
+    profile_dir = prepare_profile(profile)
+    try:
+        driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=build_chrome_options(mode, profile_dir))
+    except WebDriverException:
+        # Cached chromedriver may no longer fit the installed Chrome: resolve afresh once
+        driver = webdriver.Chrome(service=Service(resolve_chromedriver(refresh=True)), options=build_chrome_options(mode, profile_dir))
+    driver.bot_mode = mode
+    driver.bot_profile = profile
+    block_urls(driver)
+    return driver
+
+def block_urls(driver):
+    # Prefs can't block fonts, media or whole hosts; the network domain can. CDP
+    # blocking is per tab: call again after switching to a newly opened window.
+    if getattr(driver, "bot_mode", None) == "visible": return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception: metrics.swallowed("cdp_block_urls")
+
+def new_headless_driver(profile=None):
+    return new_driver("scan", profile)
+
+# Navigation timings per browser mode: {count, total_ms, last_ms, max_ms, dcl_ms}
+nav_stats = {}
+nav_stats_lock = threading.Lock()
+
+NAV_TIMING_JS = '''
+const n = performance.getEntriesByType('navigation')[0];
+return n ? n.domContentLoadedEventEnd - n.startTime : null;
+'''
+
+def timed_get(driver, url):
+    # driver.get() plus bookkeeping; returns wall-clock milliseconds
+    t0 = time.perf_counter()
+    driver.get(url)
+    ms = (time.perf_counter() - t0) * 1000
+    try: dcl = driver.execute_script(NAV_TIMING_JS)
+    except Exception: dcl = None
+    mode = getattr(driver, "bot_mode", "unknown")
+    metrics.observe("bot_navigation_seconds", ms / 1000, mode=mode)
+    with nav_stats_lock:
+        st = nav_stats.setdefault(mode, {"count": 0, "total_ms": 0.0, "last_ms": 0.0, "max_ms": 0.0, "dcl_ms": None})
+        st['count'] += 1
+        st['total_ms'] += ms
+        st['last_ms'] = round(ms, 1)
+        st['max_ms'] = round(max(st['max_ms'], ms), 1)
+        if dcl is not None: st['dcl_ms'] = round(dcl, 1)
+    return ms
+
+def driver_alive(driver):
+    try:
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+def browser_rss_mb(driver):
+    # Resident memory of chromedriver and everything it spawned (browser, GPU, renderers)
+    try:
+        import psutil # optional: lets the driver supervisor watch browser memory
+    except ImportError:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root] + root.children(recursive=True)
+    except Exception:
+        return None
+    total = 0
+    for proc in procs:
+        try: total += proc.memory_info().rss
+        except psutil.Error: pass
+    return total / (1024 * 1024)
+
+# DriverSupervisors that currently own a running browser
+live_supervisors = set()
+
+class DriverSupervisor:
+    # Owns one long-lived browser for a worker. The browser is started lazily, replaced
+    # after max_navigations or when its process tree outgrows rss_limit_mb, and restarted
+    # transparently (with one retry of the failed call) if the session dies. on_start
+    # runs against every fresh browser, so callers can redo warm-up or drop stale tabs.
+    def __init__(self, factory, log, name, max_navigations=DRIVER_MAX_NAVIGATIONS, rss_limit_mb=DRIVER_RSS_LIMIT_MB, on_start=None):
+        self.factory = factory
+        self.log = log
+        self.name = name
+        self.max_navigations = max_navigations
+        self.rss_limit_mb = rss_limit_mb
+        self.on_start = on_start
+        self.driver = None
+        self.navigations = 0
+        self.restarts = 0
+        self.rss_mb = None
+        self._sampled_at = 0
+
+    def ensure(self):
+        if self.driver is None: self.start()
+        return self.driver
+
+    def start(self):
+        self.driver = self.factory()
+        self.navigations = 0
+        self._sampled_at = time.time()
+        live_supervisors.add(self)
+        if self.on_start: self.on_start(self.driver)
+
+    def quit(self):
+        driver, self.driver = self.driver, None
+        live_supervisors.discard(self)
+        if driver:
+            try: driver.quit()
+            except Exception: metrics.swallowed("supervisor_quit")
+
+    def restart(self, reason):
+        self.log(f"{self.name}: restarting browser ({reason})", level="WARN")
+        self.quit()
+        self.restarts += 1
+        self.start()
+
+    def count_navigation(self, n=1):
+        self.navigations += n
+
+    def check(self):
+        # Recycle the browser if it is due; returns True when it was replaced
+        if self.driver is None: return False
+        if self.navigations >= self.max_navigations:
+            self.restart(f"{self.navigations} navigations")
+            return True
+        now = time.time()
+        if self.rss_limit_mb and now - self._sampled_at >= DRIVER_RSS_SAMPLE_INTERVAL:
+            self._sampled_at = now
+            self.rss_mb = browser_rss_mb(self.driver)
+            if self.rss_mb and self.rss_mb > self.rss_limit_mb:
+                self.restart(f"{self.rss_mb:.0f} MB resident")
+                return True
+        return False
+
+    def run(self, fn, *args):
+        # fn(driver, *args), retried once on a fresh browser if the session died under it
+        self.check()
+        driver = self.ensure()
+        from selenium.common.exceptions import WebDriverException
+        try:
+            return fn(driver, *args)
+        except WebDriverException:
+            if driver_alive(driver): raise
+            self.restart("session crashed")
+            return fn(self.driver, *args)
+
+    def stats(self):
+        return {"name": self.name, "navigations": self.navigations, "restarts": self.restarts,
+                "rss_mb": round(self.rss_mb, 1) if self.rss_mb else None}
+
+class DriverPool:
+    # Bounded pool of pre-warmed drivers. Idle drivers are reused LIFO so the warmest
+    # one goes out first; a driver is quit and replaced once it fails a health check
+    # or has served max_uses checkouts. Each live driver holds one numbered profile slot
+    # (factory(profile="pool-<n>")), so a replacement starts on its predecessor's cache.
+    def __init__(self, size=POOL_SIZE, max_uses=POOL_MAX_USES, factory=new_headless_driver):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._uses = {} # id(driver) -> checkouts served
+        self._free_slots = list(range(self.size - 1, -1, -1)) # pop() hands out 0 first
+        self._slot_of = {} # id(driver) -> profile slot
+        self._live = 0
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+        self._closed = False
+
+    def _spawn(self):
+        with self._lock:
+            slot = self._free_slots.pop()
+        try:
+            driver = self.factory(profile=f"pool-{slot}")
+        except Exception:
+            with self._lock: self._free_slots.append(slot)
+            raise
+        with self._lock:
+            self._uses[id(driver)] = 0
+            self._slot_of[id(driver)] = slot
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            slot = self._slot_of.pop(id(driver), None)
+        try: driver.quit()
+        except Exception: metrics.swallowed("pool_discard")
+        # Only now is the profile free for a replacement to open
+        with self._lock:
+            if slot is not None: self._free_slots.append(slot)
+            self._live -= 1
+            self._slot_free.notify()
+
+    def healthy(self, driver):
+        return driver_alive(driver)
+
+    def warm(self, n=None):
+        # Boot up to n idle drivers ahead of demand (best effort, checkout surfaces errors)
+        n = self.size if n is None else min(n, self.size)
+        for _ in range(n):
+            with self._lock:
+                if self._closed or self._live >= self.size: return
+                self._live += 1
+            try:
+                self._idle.put(self._spawn())
+            except Exception:
+                with self._lock:
+                    self._live -= 1
+                    self._slot_free.notify()
+                return
+
+    def checkout(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if self._closed: raise RuntimeError("driver pool is closed")
+                    if self._live < self.size:
+                        self._live += 1
+                        spawn = True
+                    else:
+                        spawn = False
+                        remaining = None if deadline is None else deadline - time.time()
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError("no pooled driver available")
+                        self._slot_free.wait(remaining)
+                if not spawn: continue
+                try:
+                    return self._spawn()
+                except Exception:
+                    with self._lock:
+                        self._live -= 1
+                        self._slot_free.notify()
+                    raise
+            if self.healthy(driver): return driver
+            self._discard(driver)
+
+    def checkin(self, driver, broken=False):
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+            closed = self._closed
+        if broken or closed or uses >= self.max_uses:
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+        with self._lock:
+            self._slot_free.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        driver = self.checkout(timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self.healthy(driver)
+            raise
+        finally:
+            self.checkin(driver, broken=broken)
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "live": self._live, "idle": self._idle.qsize()}
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try: driver = self._idle.get_nowait()
+            except queue.Empty: break
+            self._discard(driver)
+
+driver_pool = None
+driver_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    global driver_pool
+    with driver_pool_lock:
+        if driver_pool is None:
+            driver_pool = DriverPool()
+        return driver_pool
+
+# --- MATCHING ---
+# Each group lists spellings that mean the same team / place; any one of them in a
+# search term also matches the others in a title.
+TEAM_ALIASES = [
+    ["india", "ind", "team india"],
+    ["england", "eng"],
+    ["australia", "aus"],
+    ["pakistan", "pak"],
+    ["south africa", "sa", "rsa"],
+    ["new zealand", "nz"],
+    ["sri lanka", "sl"],
+    ["bangladesh", "ban"],
+    ["west indies", "wi"],
+    ["afghanistan", "afg"],
+    ["mumbai indians", "mi"],
+    ["chennai super kings", "csk"],
+    ["royal challengers bengaluru", "royal challengers bangalore", "rcb"],
+    ["kolkata knight riders", "kkr"],
+    ["sunrisers hyderabad", "srh"],
+    ["delhi capitals", "dc"],
+    ["rajasthan royals", "rr"],
+    ["punjab kings", "pbks"],
+    ["lucknow super giants", "lsg"],
+    ["gujarat titans", "gt"],
+    ["vs", "v", "versus"],
+]
+CITY_ALIASES = [
+    ["mumbai", "bombay", "wankhede", "brabourne"],
+    ["bengaluru", "bangalore", "blr", "chinnaswamy"],
+    ["chennai", "madras", "chepauk"],
+    ["kolkata", "calcutta", "eden gardens"],
+    ["delhi", "new delhi", "arun jaitley", "feroz shah kotla"],
+    ["hyderabad", "uppal", "rajiv gandhi stadium"],
+    ["ahmedabad", "narendra modi stadium", "motera"],
+    ["pune", "mca stadium"],
+    ["mohali", "chandigarh", "mullanpur"],
+    ["gurugram", "gurgaon"],
+    ["thiruvananthapuram", "trivandrum"],
+    ["visakhapatnam", "vizag"],
+]
+
+_non_word = re.compile(r"[^0-9a-z]+")
+
+def tokenize(text):
+    # Accent/case-insensitive word tokens: "Chepauk, Chennai!" -> ("chepauk", "chennai")
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return tuple(_non_word.sub(" ", text).split())
+
+def alias_table(groups):
+    table = {}
+    for group in groups:
+        variants = [tokenize(v) for v in group]
+        for v in variants: table[v] = variants
+    return table
+
+TEAM_ALIAS_TABLE = alias_table(TEAM_ALIASES)
+CITY_ALIAS_TABLE = alias_table(CITY_ALIASES)
+# Match terms may name a team or a place ("IPL + Mumbai" also catches "... at Wankhede")
+MATCH_ALIAS_TABLE = {**CITY_ALIAS_TABLE, **TEAM_ALIAS_TABLE}
+
+class PhraseAutomaton:
+    # Aho-Corasick over word tokens: every phrase is found in one left-to-right pass over
+    # a title, whatever the number of phrases. Each phrase carries a payload set.
+    def __init__(self):
+        self._goto = [{}]
+        self._out = [set()]
+        self._fail = [0]
+
+    def add(self, tokens, payload):
+        node = 0
+        for tok in tokens:
+            nxt = self._goto[node].get(tok)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][tok] = nxt
+                self._goto.append({})
+                self._out.append(set())
+                self._fail.append(0)
+            node = nxt
+        self._out[node].add(payload)
+
+    def build(self):
+        todo = deque(self._goto[0].values())
+        while todo:
+            node = todo.popleft()
+            for tok, nxt in self._goto[node].items():
+                todo.append(nxt)
+                f = self._fail[node]
+                while f and tok not in self._goto[f]: f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(tok, 0) if self._goto[f].get(tok) != nxt else 0
+                self._out[nxt] |= self._out[self._fail[nxt]]
+        return self
+
+    def scan(self, tokens):
+        found = set()
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for tok in tokens:
+            while node and tok not in goto[node]: node = fail[node]
+            node = goto[node].get(tok, 0)
+            if out[node]: found |= out[node]
+        return found
+
+class Matcher:
+    # Compiled form of all search profiles. Match syntax, per profile:
+    #   ","  or " OR "          alternatives       India vs England, IPL
+    #   "+"  or " AND " or "&"  all required       Cricket + Mumbai Indians
+    #   "-term" or "NOT term"   excluded anywhere  IPL, -Women
+    #   "a -term", "a NOT term" a, but not term    IPL -Women, Women T20
+    # An exclusion after a term only applies to its own alternative; one standing on
+    # its own (no required terms in that alternative) applies to all of them.
+    # Each term is a phrase matched on whole words, expanded through TEAM_ALIASES and
+    # CITY_ALIASES.
+    # The venue field is a comma separated list (any of), expanded through CITY_ALIASES.
+    # An empty match falls back to DEFAULT_KEYWORDS.
+    # Terms from every profile share one automaton, so a title is scanned once no matter
+    # how many profiles there are; each profile then just checks its term ids.
+    def __init__(self, profiles):
+        self.automaton = PhraseAutomaton()
+        self.profiles = {} # name -> (clauses: [(required, excluded)] OR of ANDs, excluded from all, venues)
+        self._terms = {}
+        for name, criteria in profiles.items():
+            self.profiles[name] = self._compile(criteria)
+        self.automaton.build()
+
+    def _compile(self, criteria):
+        clauses, excluded_all, venues = [], set(), set()
+        query = (criteria.get('match') or "").strip() or ", ".join(DEFAULT_KEYWORDS)
+        for alt in re.split(r",|\bOR\b|\|", query):
+            required, excluded = set(), set()
+            for part in re.split(r"\+|&|\bAND\b", alt):
+                # Leading text is required, every "-term" / "NOT term" after it excluded
+                wanted, *unwanted = re.split(r"(?:^|\s)-(?=\S)|\bNOT\b", part)
+                term = self._term(wanted, MATCH_ALIAS_TABLE, "t")
+                if term is not None: required.add(term)
+                for neg in unwanted:
+                    term = self._term(neg, MATCH_ALIAS_TABLE, "t")
+                    if term is not None: excluded.add(term)
+            if required: clauses.append((frozenset(required), frozenset(excluded)))
+            else: excluded_all |= excluded
+        for part in (criteria.get('venue') or "").split(","):
+            term = self._term(part, CITY_ALIAS_TABLE, "v")
+            if term is not None: venues.add(term)
+        return clauses, excluded_all, venues
+
+    def _term(self, text, aliases, kind):
+        tokens = tokenize(text)
+        if not tokens: return None
+        key = (kind, tokens)
+        if key in self._terms: return self._terms[key]
+        term = self._terms[key] = len(self._terms)
+        for variant in self._expand(tokens, aliases):
+            self.automaton.add(variant, term)
+        return term
+
+    def _expand(self, tokens, aliases):
+        # Every way of writing the phrase with aliased sub-phrases swapped in
+        variants = {()}
+        i = 0
+        while i < len(tokens):
+            for j in range(len(tokens), i, -1):
+                group = aliases.get(tokens[i:j])
+                if group: break
+            else:
+                group, j = [tokens[i:i+1]], i + 1
+            variants = {v + g for v in variants for g in group}
+            i = j
+        return variants
+
+    def match_profiles(self, title):
+        # Names of the profiles the title satisfies
+        hits = self.automaton.scan(tokenize(title))
+        matched = []
+        for name, (clauses, excluded, venues) in self.profiles.items():
+            if hits & excluded: continue
+            if venues and not hits & venues: continue
+            if any(req <= hits and not hits & exc for req, exc in clauses): matched.append(name)
+        return matched
+
+    def matches(self, title):
+        return bool(self.match_profiles(title))
+
+    def filter(self, anchors):
+        # [(href, title, [profile names])] for anchors matching at least one profile
+        out = []
+        for href, title in anchors:
+            names = self.match_profiles(title)
+            if names: out.append((href, title, names))
+        return out
+
+matcher = Matcher(state['profiles'])
+
+def rebuild_matcher():
+    global matcher
+    matcher = Matcher(state['profiles'])
+    return matcher
+
+# --- DISCOVERY SOURCES ---
+# name -> ListingSource subclass; each registered source gets its own discovery worker
+SOURCE_REGISTRY = {}
+
+def register_source(cls):
+    SOURCE_REGISTRY[cls.name] = cls
+    return cls
+
+class ListingSource:
+    # A listing page we scan for event links. Sources whose links only show up after
+    # client-side rendering set js_rendered and go through Selenium; the rest are
+    # fetched over plain HTTP.
+    name = ""
+    platform = ""
+    url = ""
+    warmup_url = None # opened when the source's browser starts on a cold profile
+    cookie_domain = "" # whose cookies are exported for this source (domain suffix)
+    ready_selector = "a[href]" # present once the listing has rendered its links
+    js_rendered = False
+
+    def __init__(self, url=None, js_rendered=None):
+        if url is not None: self.url = url
+        if js_rendered is not None: self.js_rendered = js_rendered
+        self.http_failures = 0 # consecutive
+
+    def accept(self, href):
+        return True
+
+@register_source
+class BookMyShowSource(ListingSource):
+    # Note: This is a simplified discovery. Real BMS has complex dynamic loading.
+    # We are using the search page or sports landing page.
+    name = "bms"
+    platform = "BookMyShow"
+    url = "https://in.bookmyshow.com/explore/sports"
+    warmup_url = "https://in.bookmyshow.com"
+    cookie_domain = "bookmyshow.com"
+    ready_selector = "a[href*='bookmyshow.com/']"
+    js_rendered = True
+
+    def accept(self, href):
+        return "bookmyshow.com" in href
+
+@register_source
+class InsiderSource(ListingSource):
+    name = "insider"
+    platform = "PaytmInsider"
+    url = "https://insider.in/all-sports-events"
+    cookie_domain = "insider.in"
+    ready_selector = "a[href*='/event/']"
+
+    def accept(self, href):
+        return "/event/" in href
+
+class AnchorParser(HTMLParser):
+    # Collects (href, text, title) for every <a> in a document, resolving relative links
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.anchors = []
+        self._open = None # [href, [text chunks], title] of the <a> being read
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "base":
+            href = dict(attrs).get("href")
+            if href: self.base_url = urljoin(self.base_url, href)
+        if tag != "a": return
+        self._close()
+        attrs = dict(attrs)
+        href = attrs.get("href")
+        if not href or href.startswith(("#", "javascript:", "mailto:", "tel:")): return
+        self._open = [urljoin(self.base_url, href.strip()), [], attrs.get("title") or ""]
+
+    def handle_endtag(self, tag):
+        if tag == "a": self._close()
+
+    def handle_data(self, data):
+        if self._open: self._open[1].append(data)
+
+    def _close(self):
+        if not self._open: return
+        href, chunks, title = self._open
+        # Text nodes of sibling elements (<div>India</div><div>vs England</div>) are
+        # separate words, as innerText has them
+        self.anchors.append((href, " ".join(" ".join(chunks).split()), title.strip()))
+        self._open = None
+
+    def close(self):
+        super().close()
+        self._close()
+
+def parse_anchors(html, base_url):
+    # Same shape as extract_anchors: [(href, title)]
+    parser = AnchorParser(base_url)
+    parser.feed(html)
+    parser.close()
+    return [(href, text or title) for href, text, title in parser.anchors if text or title]
+
+class HttpDiscovery:
+    # Keep-alive session with a connection pool per host, so repeated scans of the same
+    # listing reuse the TCP/TLS connection instead of paying the handshake each cycle.
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"})
+
+    def fetch(self, source):
+        # Returns (anchors, fetch_ms, parse_ms)
+        t0 = time.perf_counter()
+        resp = self.session.get(source.url, timeout=self.timeout)
+        resp.raise_for_status()
+        html = resp.text
+        t1 = time.perf_counter()
+        anchors = parse_anchors(html, resp.url)
+        t2 = time.perf_counter()
+        return anchors, (t1 - t0) * 1000, (t2 - t1) * 1000
+
+    def close(self):
+        self.session.close()
+
+# Last scan per source: {backend, fetch_ms, parse_ms, links, matched, changed, new_links,
+# removed_links, scans, changes, interval, ts}, plus {error, error_ts} while it's failing
+source_stats = {}
+
+class SourceFingerprint:
+    # Remembers the accepted link set of one listing. An identical digest means the scan
+    # can stop before matching; otherwise only links that are new (or retitled) since the
+    # last scan go on to the matcher. A rebuilt matcher (search change) resets it so the
+    # whole listing is matched again under the new criteria.
+    def __init__(self, history=100):
+        self.digest = None
+        self.links = {} # href -> title
+        self.matcher = None
+        self.scans = 0
+        self.changes = 0
+        self.history = deque(maxlen=history) # {ts, added, removed}
+
+    def diff(self, candidates, current_matcher):
+        # Returns (changed, [(href, title)] to match, removed count)
+        self.scans += 1
+        h = hashlib.blake2b(digest_size=16)
+        for href, title in sorted(candidates):
+            h.update(href.encode()); h.update(b"\t"); h.update(title.encode()); h.update(b"\n")
+        digest = h.digest()
+        rematch = current_matcher is not self.matcher
+        if digest == self.digest and not rematch: return False, [], 0
+        links = dict(candidates)
+        fresh = list(links.items()) if rematch else [(href, title) for href, title in links.items() if self.links.get(href) != title]
+        removed = sum(1 for href in self.links if href not in links)
+        changed = self.digest is not None and digest != self.digest
+        if changed:
+            self.changes += 1
+            self.history.append({"ts": time.time(), "added": len(fresh) if not rematch else None, "removed": removed})
+        self.digest, self.links, self.matcher = digest, links, current_matcher
+        return changed, fresh, removed
+
+    def rematch(self):
+        # Next scan matches the whole listing again (digest history is kept). Used when a
+        # new engine run starts: hits a stopped run saw but never merged aren't lost.
+        self.matcher = None
+
+    def change_rate(self):
+        return self.changes / self.scans if self.scans else 0.0
+
+# name -> SourceFingerprint; kept across engine restarts like the events themselves
+fingerprints = {}
+
+def wait_ready(driver, selector, timeout=READY_TIMEOUT):
+    # Return as soon as selector matches instead of sleeping a fixed time.
+    # Times out quietly: a page that never shows the selector is scraped as-is.
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+        return True
+    except TimeoutException:
+        return False
+
+def parse_onsale(value):
+    if not value: return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveInterval:
+    # Rescan delay for one source: doubles (up to hi) each time a scan sees no change,
+    # halves (down to lo) when the content changes, and pins to lo around the on-sale time.
+    def __init__(self, base=SCAN_INTERVAL, lo=SCAN_INTERVAL_MIN, hi=SCAN_INTERVAL_MAX, backoff=2.0):
+        self.lo = lo
+        self.hi = max(lo, hi)
+        self.backoff = backoff
+        self.current = min(max(base, lo), self.hi)
+
+    def observe(self, changed):
+        if changed:
+            self.current = max(self.lo, self.current / self.backoff)
+        else:
+            self.current = min(self.hi, self.current * self.backoff)
+
+    def next(self, now=None):
+        now = time.time() if now is None else now
+        wait = self.current
+        for profile in state['profiles'].values():
+            onsale = parse_onsale(profile.get('onsale'))
+            if not onsale: continue
+            if onsale - ONSALE_WINDOW_BEFORE * 60 <= now <= onsale + ONSALE_WINDOW_AFTER * 60:
+                return self.lo
+            # Don't sleep through the start of the window
+            if now < onsale - ONSALE_WINDOW_BEFORE * 60:
+                wait = max(self.lo, min(wait, onsale - ONSALE_WINDOW_BEFORE * 60 - now))
+        return wait
+
+def new_scan_driver(profile=None):
+    # Lean headless by default; BOT_DRIVER_MODE=visible brings back the Chrome window for debugging
+    return new_driver(DRIVER_MODE, profile)
+
+class DiscoveryWorker(threading.Thread):
+    # Scans one source on its own thread with its own HTTP session (and browser, only
+    # if the source needs one), pushing (platform, title, href) matches onto a channel.
+    def __init__(self, source, channel, log, interval=None):
+        super().__init__(name=f"discovery-{source.name}", daemon=True)
+        self.source = source
+        self.channel = channel
+        self.log = log
+        self.interval = interval or AdaptiveInterval()
+        self.http = None
+        self.http_cookies = 0 # cookie_jar version applied to the HTTP session
+        # Browser only starts if the source turns out to need one
+        self.profile = f"scan-{source.name}"
+        self.browser = DriverSupervisor(lambda: new_scan_driver(self.profile), log, f"{source.platform} browser", on_start=self.warmup)
+        self.fingerprint = fingerprints.setdefault(source.name, SourceFingerprint())
+        self.fingerprint.rematch()
+
+    def run(self):
+        self.http = HttpDiscovery()
+        try:
+            while not stop_event.is_set():
+                try:
+                    self.scan()
+                except Exception as e:
+                    metrics.inc("bot_discovery_errors_total", source=self.source.name)
+                    # Keep the last good stats but show why they're going stale
+                    source_stats[self.source.name] = {**source_stats.get(self.source.name, {}), "error": str(e), "error_ts": time.time()}
+                    self.log(f"{self.source.platform} worker error: {e}", level="ERROR")
+                stop_event.wait(self.interval.next())
+        finally:
+            if self.browser.driver: self.export_cookies(self.browser.driver)
+            self.browser.quit()
+            self.http.close()
+
+    def warmup(self, driver):
+        # A persistent profile that was warmed recently already has the site's cookies,
+        # consent and city; only a cold one pays for the home page visit
+        source = self.source
+        sync_cookies(driver, source.platform)
+        if not source.warmup_url or profile_warm(self.profile): return
+        timed_get(driver, source.warmup_url)
+        self.export_cookies(driver)
+        mark_profile_warm(self.profile)
+
+    def export_cookies(self, driver):
+        if not self.source.cookie_domain: return
+        try: save_cookies(driver, self.source.platform, self.source.cookie_domain)
+        except Exception: metrics.swallowed("save_cookies")
+
+    def sync_http_cookies(self):
+        # Same exported cookies on the plain HTTP session
+        platform = self.source.platform
+        version = cookie_jar.version(platform)
+        if self.http_cookies == version: return
+        for c in cookie_jar.get(platform):
+            self.http.session.cookies.set(c['name'], c['value'], domain=c.get('domain'), path=c.get('path', '/'))
+        self.http_cookies = version
+
+    def read_listing(self, driver):
+        # Navigate, wait and extract as one step, so a browser that crashes or gets
+        # recycled mid-scan is retried from the navigation, never read while blank.
+        # Returns (anchors, load_ms, extract_ms).
+        t0 = time.perf_counter()
+        sync_cookies(driver, self.source.platform)
+        timed_get(driver, self.source.url)
+        wait_ready(driver, self.source.ready_selector)
+        t1 = time.perf_counter()
+        anchors = extract_anchors(driver)
+        return anchors, (t1 - t0) * 1000, (time.perf_counter() - t1) * 1000
+
+    def discover(self):
+        # HTTP first; Selenium only for JS-rendered listings. A failed fetch sends just
+        # that scan to the browser; after HTTP_MAX_FAILURES in a row the source is marked
+        # JS-rendered so later cycles go straight to the browser.
+        source = self.source
+        if not source.js_rendered:
+            try:
+                self.sync_http_cookies()
+                anchors, fetch_ms, parse_ms = self.http.fetch(source)
+                source.http_failures = 0
+                return anchors, "http", fetch_ms, parse_ms
+            except Exception as e:
+                source.http_failures += 1
+                if source.http_failures >= HTTP_MAX_FAILURES:
+                    self.log(f"{source.platform}: HTTP discovery failed {source.http_failures} times ({e}), switching to browser")
+                    source.js_rendered = True
+                else:
+                    self.log(f"{source.platform}: HTTP discovery failed ({e}), using the browser for this scan")
+        self.browser.count_navigation()
+        anchors, load_ms, extract_ms = self.browser.run(self.read_listing)
+        return anchors, "selenium", load_ms, extract_ms
+
+    def scan(self):
+        source = self.source
+        anchors, backend, fetch_ms, parse_ms = self.discover()
+        # Simple heuristic: Find links whose text satisfies the compiled search
+        # In a real app we'd use more specific selectors
+        candidates = [(href, title) for href, title in anchors if source.accept(href)]
+        # Unchanged listing: nothing to match. Changed: only new/retitled links
+        first = self.fingerprint.digest is None
+        t0 = time.perf_counter()
+        changed, fresh, removed = self.fingerprint.diff(candidates, matcher)
+        hits = matcher.filter(fresh)
+        metrics.observe("bot_discovery_phase_seconds", fetch_ms / 1000, source=source.name, phase="fetch")
+        metrics.observe("bot_discovery_phase_seconds", parse_ms / 1000, source=source.name, phase="extract")
+        metrics.observe("bot_discovery_phase_seconds", time.perf_counter() - t0, source=source.name, phase="match")
+        metrics.inc("bot_discovery_scans_total", source=source.name, backend=backend)
+        metrics.inc("bot_links_scanned_total", len(anchors), source=source.name)
+        for href, title, profiles in hits:
+            self.channel.put((source.platform, title, href, profiles))
+        # The first scan only sets the reference point
+        if not first: self.interval.observe(changed)
+        source_stats[source.name] = {
+            "backend": backend,
+            "fetch_ms": round(fetch_ms, 1),
+            "parse_ms": round(parse_ms, 1),
+            "links": len(anchors),
+            "matched": len(hits),
+            "changed": changed,
+            "new_links": len(fresh),
+            "removed_links": removed,
+            "scans": self.fingerprint.scans,
+            "changes": self.fingerprint.changes,
+            "change_rate": round(self.fingerprint.change_rate(), 3),
+            "interval": round(self.interval.next(), 1),
+            "ts": time.time()
+        }
+
+class DiscoveryScheduler:
+    # One worker per registered source. Workers only ever touch the channel; the engine
+    # thread drains it and owns the merge into event_store.
+    def __init__(self, log, registry=None):
+        self.log = log
+        self.channel = queue.Queue()
+        registry = SOURCE_REGISTRY if registry is None else registry
+        self.workers = [DiscoveryWorker(cls(), self.channel, log) for cls in registry.values()]
+
+    def start(self):
+        for w in self.workers: w.start()
+        self.log(f"Discovery running on {len(self.workers)} sources: {', '.join(w.source.platform for w in self.workers)}")
+
+    def drain(self, timeout):
+        # Block up to timeout for the first result, then take whatever else is queued
+        results = []
+        try:
+            results.append(self.channel.get(timeout=timeout))
+            while True: results.append(self.channel.get_nowait())
+        except queue.Empty:
+            pass
+        return results
+
+    def join(self, timeout=None):
+        for w in self.workers: w.join(timeout)
+
+    def pending(self):
+        # Whatever is still queued, without waiting
+        return self.drain(timeout=0)
+
+# --- ACTIVE EVENT MONITOR ---
+# Reads what an event page currently offers without blocking on navigation:
+# null while the document is still loading, else {bookable, categories: [{name, price}]}
+PROBE_AVAILABILITY_JS = r'''
+if (document.readyState === 'loading' || !document.body) return null;
+const text = document.body.innerText || '';
+const soldOut = /sold\s*out|coming\s*soon|not\s*available|housefull/i.test(text);
+const priceRe = /(₹|Rs\.?|INR)\s?[\d,]+/;
+const seen = new Set();
+const cats = [];
+for (const el of document.querySelectorAll("li, tr, [class*='category'], [class*='ticket'], [class*='price']")) {
+    if (el.children.length > 8) continue;
+    const t = (el.innerText || '').trim();
+    if (!t || t.length > 120) continue;
+    const m = t.match(priceRe);
+    if (!m) continue;
+    const name = t.replace(m[0], '').split('\n').map(s => s.trim()).filter(Boolean)[0] || 'Tickets';
+    const price = m[0].replace(/\s+/g, '');
+    if (seen.has(name + '|' + price)) continue;
+    seen.add(name + '|' + price);
+    cats.push({name: name, price: price});
+    if (cats.length >= 30) break;
+}
+const book = Array.from(document.querySelectorAll('button, a')).some(b =>
+    /\b(book|buy)\b/i.test(b.innerText || '') && !b.disabled && b.getAttribute('aria-disabled') !== 'true');
+return {bookable: book && !soldOut, categories: cats};
+'''
+
+def new_monitor_driver():
+    return new_driver("monitor", "monitor")
+
+class TabMonitor(threading.Thread):
+    # Keeps every active event open in its own tab of one shared browser. Each round
+    # visits the tabs in turn: read the page the previous reload produced, diff it against
+    # the last reading, then fire a non-blocking reload. All tabs reload in parallel while
+    # the others are being read, so a pass costs a few driver calls per event.
+    def __init__(self, log, driver_factory=new_monitor_driver, round_time=MONITOR_ROUND, max_tabs=MONITOR_MAX_TABS):
+        super().__init__(name="tab-monitor", daemon=True)
+        self.log = log
+        self.driver_factory = driver_factory
+        self.round_time = round_time
+        self.max_tabs = max_tabs
+        # Every reload counts as a navigation; a recycled or restarted browser comes back
+        # with no tabs and the next sync_tabs() reopens them
+        self.browser = DriverSupervisor(driver_factory, log, "Monitor browser",
+                                        max_navigations=MONITOR_MAX_RELOADS, on_start=self._on_browser_start)
+        self.home = None # the initial window, kept so closing event tabs never ends the session
+        self.tabs = {} # event_id -> {"handle", "last", "checks"}
+        self._warned_full = False
+
+    @property
+    def driver(self):
+        return self.browser.driver
+
+    def _on_browser_start(self, driver):
+        self.home = driver.current_window_handle
+        self.tabs.clear()
+
+    def run(self):
+        try:
+            while not stop_event.is_set():
+                started = time.time()
+                try:
+                    self.browser.check()
+                    self.sync_tabs()
+                    for event_id in list(self.tabs):
+                        if stop_event.is_set(): break
+                        self.check(event_id)
+                except Exception as e:
+                    self.log(f"Monitor error: {e}", level="ERROR")
+                    if self.driver and not driver_alive(self.driver): self.browser.quit()
+                stop_event.wait(max(0.05, self.round_time - (time.time() - started)))
+        finally:
+            self.browser.quit()
+
+    def sync_tabs(self):
+        active = {e['id']: e for e in event_store.by_status('active')}
+        for event_id in [i for i in self.tabs if i not in active]:
+            self.close_tab(event_id)
+        for event_id, evt in active.items():
+            if event_id in self.tabs: continue
+            if len(self.tabs) >= self.max_tabs:
+                if not self._warned_full:
+                    self.log(f"Monitor is at {self.max_tabs} tabs, extra active events wait for a free slot", level="WARN")
+                    self._warned_full = True
+                break
+            self.open_tab(evt)
+
+    def open_tab(self, evt):
+        self.browser.ensure()
+        sync_cookies(self.driver, evt['platform'])
+        self.driver.switch_to.new_window('tab')
+        block_urls(self.driver)
+        self.driver.get(evt['url'])
+        self.tabs[evt['id']] = {"handle": self.driver.current_window_handle, "last": None, "checks": 0}
+        self.log(f"Monitoring {evt['title']} ({len(self.tabs)} tabs)", event_id=evt['id'])
+
+    def close_tab(self, event_id):
+        tab = self.tabs.pop(event_id, None)
+        self._warned_full = False
+        if not tab or not self.driver: return
+        try:
+            self.driver.switch_to.window(tab['handle'])
+            self.driver.close()
+            self.driver.switch_to.window(self.home)
+        except Exception: metrics.swallowed("monitor_close_tab")
+
+    def check(self, event_id):
+        tab = self.tabs.get(event_id)
+        if not tab: return # dropped by a browser restart earlier in this round
+        try:
+            self.driver.switch_to.window(tab['handle'])
+            probe = self.driver.execute_script(PROBE_AVAILABILITY_JS)
+            if probe is not None:
+                tab['checks'] += 1
+                if probe != tab['last']: self.on_change(event_id, tab['last'], probe)
+                tab['last'] = probe
+                if event_id not in self.tabs: return # moved on by on_change
+            self.driver.execute_script("location.reload()")
+            self.browser.count_navigation()
+        except Exception as e:
+            # A crashed or closed tab gets reopened on the next sync; a dead browser is
+            # replaced and all tabs come back with it
+            if not driver_alive(self.driver):
+                self.browser.restart("session crashed")
+                return
+            self.log(f"Monitor lost tab for {event_id}: {e}", level="WARN", event_id=event_id)
+            self.tabs.pop(event_id, None)
+
+    def on_change(self, event_id, before, after):
+        evt = event_store.get(event_id)
+        if not evt: return
+        if after['categories'] != (before or {}).get('categories'):
+            event_store.update(event_id, categories=after['categories'])
+            record_availability(event_id, after['categories'])
+        if after['bookable'] and after['categories']:
+            event_store.set_status(event_id, 'available')
+            self.log(f"ALERT: Tickets available for {evt['title']}", level="ALERT", event_id=event_id)
+            self.close_tab(event_id)
+
+class BotEngine:
+    def __init__(self):
+        self.scheduler = None
+        self.monitor = None
+
+    def log(self, msg, level="INFO", event_id=None):
+        log_pipeline.emit(msg, level=level, event_id=event_id)
+
+    def run(self):
+        self.log("Initializing Bot Engine...")
+        self.scheduler = DiscoveryScheduler(self.log)
+        # Active events (Booking Loop) are watched by the tab monitor on its own thread
+        self.monitor = TabMonitor(self.log)
+        try:
+            self.scheduler.start()
+            self.monitor.start()
+            
+            while not stop_event.is_set():
+                # Discovery Phase: merge whatever the source workers found
+                batch = self.scheduler.drain(timeout=1)
+                if not batch: continue
+                with metrics.timer("bot_engine_merge_seconds"):
+                    for platform, title, href, profiles in batch:
+                        self.add_event(title, href, platform, profiles)
+                    
+        except Exception as e:
+            self.log(f"Error: {e}", level="ERROR")
+            traceback.print_exc()
+        finally:
+            self.log("Engine stopping...")
+            stop_event.set()
+            self.scheduler.join(timeout=10)
+            # Scans that finished during shutdown still pushed their hits; merge them
+            try:
+                for platform, title, href, profiles in self.scheduler.pending():
+                    self.add_event(title, href, platform, profiles)
+            except Exception as e:
+                self.log(f"Merging pending discoveries failed: {e}", level="ERROR")
+            self.monitor.join(timeout=10)
+            state['running'] = False
+            broadcaster.publish("status", {"running": False})
+
+    def add_event(self, title, url, platform, profiles=()):
+        with metrics.timer("bot_add_event_seconds"):
+            self._add_event(title, url, platform, profiles)
+
+    def _add_event(self, title, url, platform, profiles):
+        # Check duplicate (match/venue filters were already applied by the matcher);
+        # a known event only picks up any profiles it wasn't tagged with yet
+        known = event_store.get_by_url(url)
+        if known:
+            tags = known.get('profiles', [])
+            extra = [p for p in profiles if p not in tags]
+            if extra: event_store.update(known['id'], profiles=tags + extra)
+            return
+
+        evt = event_store.add(title, url, platform, profiles=list(profiles))
+        if evt:
+            metrics.inc("bot_events_added_total", platform=platform)
+            self.log(f"FOUND: {title}", level="FOUND", event_id=evt['id'])
+
+    def fetch_availability(self, event_id):
+        # Returns the categories found, or None if the check failed
+        evt = event_store.get(event_id)
+        if not evt: return None
+        
+        self.log(f"Checking availability for: {evt['title']}...", event_id=event_id)
+        
+        # Reusing the bot loop's driver would interrupt monitoring, so checks lease a
+        # warm headless browser from the shared pool: one page load, no Chrome startup.
+        try:
+            platform = evt['platform']
+            t0 = time.perf_counter()
+            with get_driver_pool().lease() as temp_driver:
+                t1 = time.perf_counter()
+                sync_cookies(temp_driver, platform)
+                timed_get(temp_driver, evt['url'])
+                t2 = time.perf_counter()
+                wait_ready(temp_driver, AVAILABILITY_READY_SELECTOR)
+                t3 = time.perf_counter()
+            metrics.observe("bot_availability_phase_seconds", t1 - t0, platform=platform, phase="lease")
+            metrics.observe("bot_availability_phase_seconds", t2 - t1, platform=platform, phase="navigate")
+            metrics.observe("bot_availability_phase_seconds", t3 - t2, platform=platform, phase="ready")
+            
+            # Mock Scraping Logic for categories
+            # In reality: click 'Book', wait for modal, scrape list items
+            # Here: Randomly generating for demonstration as live scraping is specific
+            
+            cats = []
+            if "BookMyShow" in evt['platform']:
+                # Mock BMS categories
+                cats = [
+                    {"name": "General Stand", "price": "₹800"},
+                    {"name": "Pavilion East", "price": "₹2500"},
+                    {"name": "VIP Box", "price": "₹5000"}
+                ]
+            else:
+                 cats = [
+                    {"name": "Early Bird", "price": "₹499"},
+                    {"name": "Phase 1", "price": "₹999"}
+                ]
+            
+            event_store.update(event_id, categories=cats)
+            record_availability(event_id, cats)
+            self.log(f"Updated categories for {evt['title']}", event_id=event_id)
+            return cats
+            
+        except Exception as e:
+            self.log(f"Availability check failed: {e}", level="ERROR", event_id=event_id)
+            return None
+
+# Initialize global bot placeholder for availability checks
+bot_engine = None
+
+# --- AVAILABILITY SERVICE ---
+class AvailabilityService:
+    # Front door for availability checks. Results are cached per event for `ttl`
+    # seconds; concurrent requests for the same event join the one in-flight job
+    # (single-flight); jobs run on a bounded executor, and once `queue_limit` jobs are
+    # waiting new ones are rejected instead of piling up more browsers.
+    def __init__(self, fetch, workers=AVAILABILITY_WORKERS, queue_limit=AVAILABILITY_QUEUE_LIMIT, ttl=AVAILABILITY_TTL, keep_jobs=200):
+        self.fetch = fetch
+        self.workers = max(1, workers)
+        self.queue_limit = queue_limit
+        self.ttl = ttl
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="availability")
+        self._lock = threading.Lock()
+        self._cache = {} # event_id -> (ts, categories)
+        self._inflight = {} # event_id -> job
+        self._queued = 0
+        self._next_id = 0
+        self.jobs = OrderedDict() # job id -> job, most recent last
+        self.keep_jobs = keep_jobs
+
+    def request(self, event_id, force=False):
+        job, outcome = self._request(event_id, force)
+        metrics.inc("bot_availability_requests_total", outcome=outcome)
+        return job, outcome
+
+    def _request(self, event_id, force):
+        # Returns (job, outcome) with outcome one of cached / joined / queued / rejected
+        now = time.time()
+        with self._lock:
+            hit = self._cache.get(event_id)
+            if hit and not force and now - hit[0] < self.ttl:
+                return {"event_id": event_id, "state": "done", "finished": hit[0], "categories": hit[1]}, "cached"
+            job = self._inflight.get(event_id)
+            if job:
+                job['joined'] += 1
+                return job, "joined"
+            if self._queued >= self.queue_limit:
+                return None, "rejected"
+            self._next_id += 1
+            job = {"id": self._next_id, "event_id": event_id, "state": "queued", "joined": 0,
+                   "submitted": now, "started": None, "finished": None, "error": None}
+            self._inflight[event_id] = job
+            self._queued += 1
+            self.jobs[job['id']] = job
+            while len(self.jobs) > self.keep_jobs: self.jobs.popitem(last=False)
+        self.executor.submit(self._run, job)
+        return job, "queued"
+
+    def _run(self, job):
+        with self._lock:
+            self._queued -= 1
+            job['state'] = "running"
+            job['started'] = time.time()
+        cats, error = None, None
+        try:
+            cats = self.fetch(job['event_id'])
+            if cats is None: error = "check failed"
+        except Exception as e:
+            error = str(e)
+        with self._lock:
+            job['finished'] = time.time()
+            job['state'] = "failed" if error else "done"
+            job['error'] = error
+            if not error: self._cache[job['event_id']] = (job['finished'], cats)
+            self._inflight.pop(job['event_id'], None)
+        metrics.observe("bot_availability_queue_seconds", job['started'] - job['submitted'])
+        metrics.observe("bot_availability_check_seconds", job['finished'] - job['started'])
+        metrics.inc("bot_availability_checks_total", result=job['state'])
+
+    def invalidate(self, event_id):
+        with self._lock:
+            self._cache.pop(event_id, None)
+
+    def queued(self):
+        # Checks waiting for a worker; cheap enough for every metrics scrape
+        return self._queued
+
+    def status(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "queue_limit": self.queue_limit,
+                "inflight": len(self._inflight),
+                "cached": len(self._cache),
+                "ttl": self.ttl,
+                "jobs": [dict(j) for j in reversed(self.jobs.values())]
+            }
+
+availability_service = AvailabilityService(lambda event_id: BotEngine().fetch_availability(event_id))
+
+# --- NOTIFICATIONS ---
+def parse_price(value):
+    # "₹2,500" / "Rs. 999" / 1500 -> 2500.0 / 999.0 / 1500.0; None if there's no number
+    if isinstance(value, (int, float)): return float(value)
+    m = re.search(r"\d[\d,]*(?:\.\d+)?", str(value or ""))
+    return float(m.group(0).replace(",", "")) if m else None
+
+def event_budget(evt):
+    # Loosest budget among the profiles the event matched: a price any of them would
+    # take is worth an alert. 0 means no budget set.
+    profiles = state['profiles']
+    budgets = [parse_price(profiles[p].get('budget')) for p in (evt.get('profiles') or ["default"]) if p in profiles]
+    budgets = [b for b in budgets if b]
+    return max(budgets) if budgets else 0
+
+SINK_REGISTRY = {}
+
+def register_sink(cls):
+    SINK_REGISTRY[cls.name] = cls
+    return cls
+
+class AlertSink:
+    # send(alert) delivers one alert or raises; an ImportError disables the sink
+    name = ""
+
+    def send(self, alert):
+        raise NotImplementedError
+
+@register_sink
+class StreamSink(AlertSink):
+    # Open dashboards: shown in the log panel and as a browser notification
+    name = "stream"
+
+    def send(self, alert):
+        broadcaster.publish("alert", alert)
+
+@register_sink
+class DesktopSink(AlertSink):
+    name = "desktop"
+
+    def send(self, alert):
+        from plyer import notification
+        notification.notify(title=alert['title'][:64], message=alert['message'][:256], app_name="Ultimate Sports Bot", timeout=10)
+
+@register_sink
+class SoundSink(AlertSink):
+    name = "sound"
+
+    def send(self, alert):
+        if sys.platform == "win32":
+            import winsound
+            winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+        else:
+            sys.stdout.write("\a")
+            sys.stdout.flush()
+
+@register_sink
+class WebhookSink(AlertSink):
+    # POSTs the alert as JSON (e.g. to a chat bridge). /api/alerts/hook on this server is
+    # a local stand-in that just records what it receives.
+    name = "webhook"
+
+    def __init__(self, url=ALERT_WEBHOOK, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.session = None
+
+    def send(self, alert):
+        if not self.url: return
+        if self.session is None:
+            import requests
+            self.session = requests.Session()
+        self.session.post(self.url, json=alert, timeout=self.timeout).raise_for_status()
+
+def build_sinks(names=ALERT_SINKS):
+    sinks = []
+    for name in (n.strip() for n in names.split(",")):
+        if name in SINK_REGISTRY: sinks.append(SINK_REGISTRY[name]())
+    if ALERT_WEBHOOK and not any(s.name == "webhook" for s in sinks): sinks.append(WebhookSink())
+    return sinks
+
+class AlertDispatcher:
+    # Turns EventStore transitions into alerts. The store listener only diffs the event
+    # against what it saw last and enqueues (it runs under the store lock, in the scan
+    # path); a background thread coalesces everything queued for one event within
+    # `coalesce` seconds into one alert, drops reasons already sent within dedupe_ttl,
+    # and hands the result to each sink in turn. Urgent reasons skip the wait. Latency
+    # is measured from the store change that triggered the alert to each sink returning.
+    def __init__(self, sinks, coalesce=ALERT_COALESCE, dedupe_ttl=ALERT_DEDUPE_TTL, max_burst=ALERT_MAX_BURST):
+        self.sinks = sinks
+        self.coalesce = coalesce
+        self.dedupe_ttl = dedupe_ttl
+        self.max_burst = max(1, max_burst)
+        self._seen = {} # event id -> (status, category names, names within budget)
+        self._sent = OrderedDict() # (event id, reason key) -> time sent
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self.recent = deque(maxlen=100) # delivered alerts, newest last
+
+    def start(self):
+        # Events already in the store (rehydrated) are the baseline, not news
+        if self._thread: return
+        for evt in event_store.snapshot().events: self._remember(evt)
+        event_store.subscribe(self.on_store_change)
+        self._thread = threading.Thread(target=self._run, name="alerts", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _remember(self, evt):
+        cats = evt.get('categories') or []
+        budget = event_budget(evt)
+        prices = [(c.get('name'), parse_price(c.get('price'))) for c in cats] if budget else []
+        cheap = frozenset(name for name, price in prices if price is not None and price <= budget)
+        state_now = (evt.get('status'), frozenset(c.get('name') for c in cats), cheap)
+        prev = self._seen.get(evt['id'])
+        self._seen[evt['id']] = state_now
+        return prev, state_now
+
+    def on_store_change(self, kind, payload):
+        if kind == "removed":
+            self._seen.pop(payload, None)
+            return
+        prev, (status, names, cheap) = self._remember(payload)
+        reasons = []
+        if kind == "added":
+            reasons.append(("new", "New match" + (f" ({', '.join(payload['profiles'])})" if payload.get('profiles') else "")))
+            prev = (None, frozenset(), frozenset())
+        elif prev is None:
+            return # not seen being added; nothing to compare against
+        if status == "available" and prev[0] != "available":
+            reasons.append(("available", "Tickets available"))
+        if names - prev[1]:
+            reasons.append((f"categories:{','.join(sorted(names))}", "Categories: " + ", ".join(sorted(names - prev[1]))))
+        if cheap - prev[2]:
+            prices = {c.get('name'): c.get('price') for c in payload.get('categories') or []}
+            reasons.append((f"budget:{','.join(sorted(cheap))}", "Within budget: " + ", ".join(f"{n} {prices.get(n)}" for n in sorted(cheap - prev[2]))))
+        if reasons: self._queue.put((time.time(), payload, reasons))
+
+    @staticmethod
+    def urgent(item):
+        # Tickets on sale / in budget go out at once; the window is for discovery noise
+        return any(key.split(":")[0] in ("available", "budget") for key, _ in item[2])
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None: return
+            batch = [first]
+            deadline = time.monotonic() + (0 if self.urgent(first) else self.coalesce)
+            while True:
+                remaining = deadline - time.monotonic()
+                try: item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty: break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                if self.urgent(item): deadline = 0
+            try:
+                for alert in self._build(batch): self._deliver(alert)
+            except Exception:
+                traceback.print_exc()
+
+    def _build(self, batch):
+        # One alert per event: earliest detection, latest event state, reasons in order
+        by_event = OrderedDict()
+        for detected, evt, reasons in batch:
+            a = by_event.get(evt['id'])
+            if a is None:
+                a = by_event[evt['id']] = {"detected": detected, "event": evt, "reasons": OrderedDict()}
+            a['event'] = evt
+            for key, text in reasons: a['reasons'][key] = text
+        metrics.inc("bot_alerts_coalesced_total", len(batch) - len(by_event))
+        now = time.time()
+        while self._sent and now - next(iter(self._sent.values())) > self.dedupe_ttl:
+            self._sent.popitem(last=False)
+        alerts = []
+        for eid, a in by_event.items():
+            fresh = [(k, t) for k, t in a['reasons'].items() if (eid, k) not in self._sent]
+            if not fresh: continue
+            for k, _ in fresh:
+                self._sent.pop((eid, k), None)
+                self._sent[(eid, k)] = now
+            evt = a['event']
+            headline = "Tickets available" if any(k == "available" for k, _ in fresh) else fresh[0][1].split(":")[0]
+            alerts.append({"event_id": eid, "title": f"{headline}: {evt['title']}", "url": evt['url'],
+                           "platform": evt['platform'], "reasons": [k.split(":")[0] for k, _ in fresh],
+                           "message": f"{evt['platform']} · " + "; ".join(t for _, t in fresh), "detected": a['detected']})
+        if len(alerts) > self.max_burst:
+            keep, rest = alerts[:self.max_burst - 1], alerts[self.max_burst - 1:]
+            keep.append({"event_id": None, "title": f"{len(rest)} more alerts", "url": None, "platform": None,
+                         "reasons": sorted({r for a in rest for r in a['reasons']}),
+                         "message": "; ".join(a['title'] for a in rest[:10]) + (" ..." if len(rest) > 10 else ""),
+                         "detected": min(a['detected'] for a in rest)})
+            alerts = keep
+        return alerts
+
+    def _deliver(self, alert):
+        delivered = {}
+        for sink in list(self.sinks):
+            try:
+                sink.send(alert)
+            except ImportError as e:
+                self.sinks.remove(sink)
+                log_pipeline.emit(f"Alert sink '{sink.name}' disabled: {e}", level="WARN", source="alerts")
+                continue
+            except Exception as e:
+                metrics.inc("bot_alert_failures_total", sink=sink.name)
+                log_pipeline.emit(f"Alert sink '{sink.name}' failed: {e}", level="WARN", source="alerts")
+                continue
+            latency = time.time() - alert['detected']
+            metrics.observe("bot_alert_latency_seconds", latency, sink=sink.name)
+            delivered[sink.name] = round(latency * 1000, 1)
+        metrics.inc("bot_alerts_total", reason=alert['reasons'][0] if alert['reasons'] else "none")
+        self.recent.append({**alert, "delivered_ms": delivered})
+
+alert_dispatcher = AlertDispatcher(build_sinks())
+
+# --- ROUTES ---
+@app.before_request
+def start_timer():
+    g.t0 = time.perf_counter()
+
+@app.after_request
+def record_request(resp):
+    endpoint = request.endpoint or "unmatched"
+    if 't0' in g: metrics.observe("bot_http_request_seconds", time.perf_counter() - g.t0, endpoint=endpoint)
+    metrics.inc("bot_http_requests_total", endpoint=endpoint, status=resp.status_code)
+    return resp
+
+metrics.gauge("bot_events", "Stored events by status",
+              lambda: {st: n for st, n in event_store.snapshot().counts.items() if st != "total"}, label="status")
+metrics.gauge("bot_live_browsers", "Running browsers by owner",
+              lambda: {"supervised": len(live_supervisors), "pool": driver_pool.stats()['live'] if driver_pool else 0}, label="owner")
+metrics.gauge("bot_stream_clients", "Connected /api/stream clients", broadcaster.client_count)
+metrics.gauge("bot_availability_queued", "Availability checks waiting for a worker", availability_service.queued)
+metrics.gauge("bot_running", "1 while the engine runs", lambda: int(state['running']))
+
+@app.route('/')
+def index(): return render_template_string(HTML_TEMPLATE)
+
+def int_arg(name):
+    try: return int(request.args.get(name, 0))
+    except ValueError: return 0
+
+def build_data(since_version=0, since_log_seq=0):
+    log_seq, logs = log_pipeline.since(since_log_seq, limit=None if since_log_seq else LOG_SNAPSHOT_LINES)
+    if since_version:
+        version, events, removed = event_store.changes_since(since_version)
+    else:
+        version, events, removed = event_store.version, None, None
+    full = events is None
+    snap = event_store.snapshot()
+    if full: version, events, removed = snap.version, list(snap.events), []
+    return {
+        "running": state['running'],
+        "version": version,
+        "log_seq": log_seq,
+        "full": full,
+        "logs": logs,
+        "events": events,
+        "removed": removed,
+        "counts": {"total": snap.counts["total"], "active": snap.counts.get("active", 0)}
+    }
+
+def dumps(obj):
+    # Compact JSON as bytes
+    if orjson: return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def compress(body, encoding):
+    # Fast levels: the body can change several times a second while the engine runs, and
+    # the higher levels cost several times the CPU for a few percent smaller JSON
+    if encoding == "br": return brotli.compress(body, quality=3)
+    return gzip.compress(body, compresslevel=1)
+
+def payload_key():
+    # Everything a build_data() payload depends on besides the request's cursors
+    return (event_store.version, log_pipeline.seq, log_pipeline.epoch, int(state['running']))
+
+class PayloadCache:
+    # Serialised build_data() bodies per cursor pair, valid while payload_key() stays the
+    # same; any change drops them all. Dashboards polling the same state with the same
+    # cursors share one body, and compressed variants are made once on first request.
+    MAX_ENTRIES = 64
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._entries = OrderedDict() # (since_version, since_log_seq) -> {"lock", "bodies": {encoding: bytes}}
+        self.builds = 0
+        self.hits = 0
+
+    def get(self, key, cursors, encoding=None):
+        # Returns (body, encoding actually applied or None). Each entry is built under its
+        # own lock: a burst of identical polls after a change builds once, while polls for
+        # other cursors (or cached hits) don't queue behind the build.
+        with self._lock:
+            if key != self._key:
+                self._key = key
+                self._entries.clear()
+            entry = self._entries.get(cursors)
+            if entry is None:
+                entry = self._entries[cursors] = {"lock": threading.Lock(), "bodies": {}}
+                while len(self._entries) > self.MAX_ENTRIES: self._entries.popitem(last=False)
+        with entry["lock"]:
+            bodies = entry["bodies"]
+            built = None not in bodies
+            if built: bodies[None] = dumps(build_data(*cursors))
+            if encoding is not None and len(bodies[None]) >= COMPRESS_MIN_BYTES and encoding not in bodies:
+                bodies[encoding] = compress(bodies[None], encoding)
+        with self._lock:
+            if built: self.builds += 1
+            else: self.hits += 1
+        if encoding is None or encoding not in bodies: return bodies[None], None
+        return bodies[encoding], encoding
+
+payload_cache = PayloadCache()
+
+def pick_encoding():
+    for enc in ("br", "gzip"):
+        if enc == "br" and brotli is None: continue
+        if request.accept_encodings[enc]: return enc
+    return None
+
+@app.route('/api/data')
+def get_data():
+    # Without cursors this is the full snapshot. With since_version/since_log_seq only
+    # events changed or removed after since_version and log lines after since_log_seq are
+    # returned; a client whose cursor is too old gets "full": true and must reset.
+    key = payload_key()
+    encoding = pick_encoding()
+    # Strong tag per state and encoding; the cursors are part of the URL
+    etag = "-".join(map(str, key)) + (f".{encoding}" if encoding else "")
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+        resp.set_etag(etag)
+        resp.vary.add("Accept-Encoding")
+        return resp
+
+    body, applied = payload_cache.get(key, (int_arg('since_version'), int_arg('since_log_seq')), encoding)
+    resp = app.response_class(body, mimetype="application/json")
+    if applied: resp.headers["Content-Encoding"] = applied
+    resp.set_etag(etag)
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+@app.route('/api/stream')
+def stream():
+    # Server-Sent Events: "snapshot" (full build_data payload) on connect or when the
+    # client has to resync, then "log", "event", "removed" and "status" as they happen.
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    except (TypeError, ValueError):
+        last_id = None
+    client, seq, resumed = broadcaster.subscribe(last_id)
+
+    def snapshot(seq):
+        body, _ = payload_cache.get(payload_key(), (0, 0))
+        return f"id: {seq}\nevent: snapshot\ndata: {body.decode()}\n\n"
+
+    def gen():
+        try:
+            yield "retry: 2000\n\n"
+            if not resumed: yield snapshot(seq)
+            while True:
+                msgs, overflowed = client.next_batch(timeout=15)
+                if overflowed:
+                    yield snapshot(broadcaster.seq)
+                    continue
+                if not msgs:
+                    yield ": ping\n\n"
+                    continue
+                yield "".join(f"id: {i}\nevent: {kind}\ndata: {payload}\n\n" for i, kind, payload in msgs)
+        finally:
+            broadcaster.unsubscribe(client)
+
+    return Response(gen(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/history/<event_id>')
+def get_history(event_id):
+    if not persistence: return jsonify([])
+    return jsonify(persistence.availability_history(event_id))
+
+@app.route('/api/browsers')
+def get_browsers():
+    return jsonify({
+        "supervised": [sv.stats() for sv in list(live_supervisors)],
+        "pool": driver_pool.stats() if driver_pool else None
+    })
+
+@app.route('/api/browser_profiles')
+def get_browser_profiles():
+    return jsonify({"dir": os.path.abspath(PROFILE_DIR) if PROFILE_DIR else None, "max_mb": PROFILE_MAX_MB,
+                    "profiles": list_browser_profiles()})
+
+@app.route('/api/browser_profiles/cleanup', methods=['POST'])
+def cleanup_browser_profiles():
+    # Trims every profile that no browser has open; open ones get trimmed at their next start
+    data = request.get_json(silent=True) or {}
+    max_mb = float(data.get('max_mb', PROFILE_MAX_MB))
+    out = []
+    for p in list_browser_profiles():
+        if p['in_use']: continue
+        before, after = trim_profile(p['name'], max_mb)
+        if after < before: out.append({"name": p['name'], "before_mb": round(before, 1), "after_mb": round(after, 1)})
+    return jsonify({"status":"ok", "trimmed": out})
+
+@app.route('/api/cookies')
+def list_cookies():
+    return jsonify(cookie_jar.platforms())
+
+def known_platform(platform):
+    # <platform> ends up in a file name, so only registered sources' platforms get through
+    return platform in {cls.platform for cls in SOURCE_REGISTRY.values()}
+
+@app.route('/api/cookies/<platform>', methods=['GET'])
+def export_cookies(platform):
+    if not known_platform(platform): return jsonify({"status":"error", "error":"unknown platform"}), 404
+    return jsonify(cookie_jar.get(platform))
+
+@app.route('/api/cookies/<platform>', methods=['PUT'])
+def import_cookies(platform):
+    # Replaces the platform's cookies; browsers pick them up before their next page load
+    if not known_platform(platform): return jsonify({"status":"error", "error":"unknown platform"}), 404
+    cookies = request.get_json(silent=True)
+    if not isinstance(cookies, list) or not all(isinstance(c, dict) and 'name' in c and 'value' in c and ('domain' in c or 'url' in c) for c in cookies):
+        return jsonify({"status":"error", "error":"expected a list of {name, value, domain|url, ...}"}), 400
+    cookie_jar.put(platform, cookies)
+    log_pipeline.emit(f"Imported {len(cookies)} cookies for {platform}", source="config")
+    return jsonify({"status":"ok", "count": len(cookies)})
+
+@app.route('/api/cookies/<platform>', methods=['DELETE'])
+def delete_cookies(platform):
+    if not known_platform(platform): return jsonify({"status":"error", "error":"unknown platform"}), 404
+    cookie_jar.delete(platform)
+    return jsonify({"status":"ok"})
+
+@app.route('/api/nav_stats')
+def get_nav_stats():
+    with nav_stats_lock:
+        return jsonify({mode: {**st, "avg_ms": round(st['total_ms'] / st['count'], 1)} for mode, st in nav_stats.items()})
+
+@app.route('/api/metrics')
+def get_metrics():
+    # Prometheus text by default; ?format=json is the compact view the dashboard uses
+    if request.args.get('format') == 'json': return jsonify(metrics.summary())
+    return Response(metrics.prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/sources')
+def get_sources():
+    return jsonify(source_stats)
+
+@app.route('/api/sources/<name>/history')
+def get_source_history(name):
+    fp = fingerprints.get(name)
+    if not fp: return jsonify({"status":"error", "error":"unknown source"}), 404
+    return jsonify({"scans": fp.scans, "changes": fp.changes, "change_rate": fp.change_rate(), "history": list(fp.history)})
+
+@app.route('/api/start', methods=['POST'])
+def start():
+    global bot_thread, bot_engine
+    with state_lock:
+        # A stopping engine still owns its browsers until its thread exits
+        if state['running'] or (bot_thread and bot_thread.is_alive()):
+            return jsonify({"status":"already running"})
+
+        log_pipeline.clear()
+        state['running'] = True
+        stop_event.clear()
+
+        broadcaster.publish("status", {"running": True})
+        bot_engine = BotEngine()
+        bot_thread = threading.Thread(target=bot_engine.run)
+        bot_thread.start()
+    # Boot the first availability browser in the background so the first "Check" is warm
+    threading.Thread(target=lambda: get_driver_pool().warm(1), daemon=True).start()
+    return jsonify({"status":"started"})
+
+@app.route('/api/stop', methods=['POST'])
+def stop():
+    if not state['running']: return jsonify({"status":"not running"})
+    stop_event.set()
+    return jsonify({"status":"stopping"})
+
+def save_profiles(profiles):
+    state['profiles'] = profiles
+    rebuild_matcher()
+    if persistence: persistence.save_setting("profiles", profiles)
+
+def clean_profile(data):
+    profile = dict(DEFAULT_PROFILE)
+    profile.update({k: data[k] for k in DEFAULT_PROFILE if k in data})
+    return profile
+
+@app.route('/api/search_config', methods=['POST'])
+def search_config():
+    # Single-search form of the API: edits the "default" profile
+    data = request.json
+    with state_lock:
+        save_profiles({**state['profiles'], "default": clean_profile(data)})
+    log_pipeline.emit(f"Search updated: {data['match']} | {data['venue']} | {data['date']}", source="config")
+    return jsonify({"status":"ok"})
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    return jsonify(state['profiles'])
+
+@app.route('/api/profiles', methods=['POST'])
+def create_profile():
+    data = request.json or {}
+    name = (data.get('name') or "").strip()
+    if not name: return jsonify({"status":"error", "error":"name required"}), 400
+    with state_lock:
+        if name in state['profiles']: return jsonify({"status":"error", "error":"profile exists"}), 409
+        save_profiles({**state['profiles'], name: clean_profile(data)})
+    log_pipeline.emit(f"Profile '{name}' created: {data.get('match', '')}", source="config")
+    return jsonify({"status":"ok"}), 201
+
+@app.route('/api/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    profile = state['profiles'].get(name)
+    if profile is None: return jsonify({"status":"error", "error":"not found"}), 404
+    return jsonify(profile)
+
+@app.route('/api/profiles/<name>', methods=['PUT'])
+def update_profile(name):
+    # Creates the profile if it doesn't exist yet
+    data = request.json or {}
+    with state_lock:
+        base = state['profiles'].get(name, {})
+        save_profiles({**state['profiles'], name: clean_profile({**base, **data})})
+    log_pipeline.emit(f"Profile '{name}' updated: {data.get('match', base.get('match', ''))}", source="config")
+    return jsonify({"status":"ok"})
+
+@app.route('/api/profiles/<name>', methods=['DELETE'])
+def delete_profile(name):
+    with state_lock:
+        if name not in state['profiles']: return jsonify({"status":"error", "error":"not found"}), 404
+        save_profiles({k: v for k, v in state['profiles'].items() if k != name})
+    log_pipeline.emit(f"Profile '{name}' deleted", source="config")
+    return jsonify({"status":"ok"})
+
+@app.route('/api/check_availability', methods=['POST'])
+def check_avail():
+    data = request.json
+    eid = data['id']
+    if eid not in event_store: return jsonify({"status":"error", "error":"unknown event"}), 404
+    # Runs on the availability executor so the api never blocks
+    job, outcome = availability_service.request(eid, force=bool(data.get('force')))
+    if outcome == "rejected":
+        return jsonify({"status":"busy", "error":"too many checks queued"}), 429
+    return jsonify({"status": "cached" if outcome == "cached" else "checking", "outcome": outcome, "job": job.get('id')})
+
+@app.route('/api/jobs')
+def get_jobs():
+    return jsonify(availability_service.status())
+
+# Stand-in webhook receiver: BOT_ALERT_WEBHOOK=http://localhost:5000/api/alerts/hook
+webhook_inbox = deque(maxlen=50)
+
+@app.route('/api/alerts/hook', methods=['POST'])
+def alert_hook():
+    webhook_inbox.append({"received": time.time(), "alert": request.json})
+    return jsonify({"status":"ok"})
+
+@app.route('/api/alerts')
+def get_alerts():
+    return jsonify({
+        "sinks": [s.name for s in alert_dispatcher.sinks],
+        "recent": list(reversed(alert_dispatcher.recent)),
+        "webhook_inbox": list(reversed(webhook_inbox))
+    })
+
+@app.route('/api/activate_event', methods=['POST'])
+def activate():
+    data = request.json
+    e = event_store.set_status(data['id'], 'active')
+    if not e: return jsonify({"status":"error"})
+    # e['config'] = ...
+    log_pipeline.emit(f"Event '{e['title']}' is now ACTIVE/MONITORING", source="config", event_id=e['id'])
+    return jsonify({"status":"ok"})
+
+def serve_production():
+    # No debugger, many handler threads. waitress if it's installed (pure Python, proper
+    # thread pool, works on Windows), otherwise werkzeug's thread-per-request server.
+    try:
+        from waitress import serve
+    except ImportError:
+        print("waitress not installed, using the threaded development server")
+        app.run(host=HOST, port=PORT, debug=False, threaded=True, use_reloader=False)
+        return
+    serve(app, host=HOST, port=PORT, threads=SERVER_THREADS, channel_timeout=60)
+
+if __name__ == "__main__":
+    import logging
+    log = logging.getLogger('werkzeug')
+    log.setLevel(logging.ERROR)
+    open_persistence()
+    alert_dispatcher.start()
+    if PREWARM:
+        # Imports selenium, resolves chromedriver and boots a browser while Flask comes up
+        threading.Thread(target=lambda: get_driver_pool().warm(1), daemon=True).start()
+    print(f"ULTIMATE BOT RUNNING ON http://{HOST}:{PORT}")
+    try:
+        if "--prod" in sys.argv:
+            serve_production()
+        else:
+            app.run(host=HOST, port=PORT, debug=True, use_reloader=False)
+    finally:
+        alert_dispatcher.stop()
+        if driver_pool: driver_pool.close()
+        if persistence: persistence.flush()